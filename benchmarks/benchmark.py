@@ -0,0 +1,166 @@
+"""
+Throughput benchmarks of the simulation and the evolution.
+
+Every scenario runs headless and seeded in its own process, evolves a few generations
+and reports ticks/sec, agent-steps/sec (ticks lived by the agents, the real amount of work),
+generations/sec and the peak memory of the process. Scenarios are the cartesian product
+of the swept population sizes, sensor counts, hidden layer sizes and obstacle counts.
+Results are saved as json, pass a previous results file with --compare to spot regressions.
+
+    python -m benchmarks.benchmark --population 100 1000 --obstacles 2 500 --output results.json
+    python -m benchmarks.benchmark --compare results.json
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import platform
+import resource
+import time
+import numpy as np
+
+from src.common.constants import EvolutionSettings
+from src.environment.create_map import create_map, create_random_map
+from src.evolutionary_neural_network.create_population import create_population
+from src.evolutionary_neural_network.genetic import Genetic
+from src.simulation.engine import Simulation
+
+
+def run_scenario(scenario):
+    """
+    Evolves the scenario for its number of generations and returns its measures.
+    """
+    np.random.seed(scenario["seed"]) #initial weights
+    population = create_population(
+        scenario["population"],
+        nb_sensors=scenario["sensors"],
+        hidden_layers=scenario["hidden_layers"],
+        hidden_units=scenario["hidden_units"]
+    )
+    evolution = Genetic(
+        population,
+        max(1, int(scenario["population"] / 10)),
+        EvolutionSettings.MUTATION_RATE,
+        scenario["population"],
+        rng=np.random.default_rng(scenario["seed"])
+    )
+    if scenario["obstacles"] == 2:
+        obstacles = create_map()
+    else:
+        obstacles = create_random_map(scenario["obstacles"], seed=scenario["seed"])
+    simulation = Simulation(evolution, obstacles)
+    agent_steps = 0
+    start = time.perf_counter()
+    while simulation.generation < scenario["generations"]:
+        agent_steps += int(np.count_nonzero(simulation.state.alive))
+        simulation.step()
+    elapsed = time.perf_counter() - start
+    ticks = simulation.clock.ticks
+    return dict(
+        scenario,
+        seconds=elapsed,
+        ticks=ticks,
+        agent_steps=agent_steps,
+        ticks_per_second=ticks / elapsed,
+        agent_steps_per_second=agent_steps / elapsed,
+        generations_per_second=scenario["generations"] / elapsed,
+        peak_memory_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 #kilobytes on linux
+    )
+
+
+def make_scenarios(args):
+    scenarios = []
+    for population, sensors, hidden_units, hidden_layers, obstacles in itertools.product(
+            args.population, args.sensors, args.hidden_units, args.hidden_layers, args.obstacles):
+        scenarios.append(dict(
+            population=population,
+            sensors=sensors,
+            hidden_units=hidden_units,
+            hidden_layers=hidden_layers,
+            obstacles=obstacles,
+            generations=args.generations,
+            seed=args.seed
+        ))
+    return scenarios
+
+
+def scenario_key(result):
+    return tuple(result[key] for key in ("population", "sensors", "hidden_units", "hidden_layers", "obstacles"))
+
+
+def load_baseline(path):
+    """
+    The results of a previous run by scenario, read before benchmarking so a bad file fails at once.
+    """
+    with open(path) as file:
+        try:
+            return {scenario_key(result): result for result in json.load(file)["results"]}
+        except (ValueError, KeyError, TypeError):
+            raise ValueError("{} isn't a results file of this benchmark".format(path))
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints the speed of every scenario relative to the same scenario of a previous run,
+    flagging the ones that got slower than the tolerance. Returns the number of regressions.
+    """
+    regressions = 0
+    for result in results:
+        previous = baseline.get(scenario_key(result))
+        if previous is None:
+            continue
+        ratio = result["agent_steps_per_second"] / previous["agent_steps_per_second"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            flag = "  REGRESSION"
+            regressions += 1
+        print("{}: {:.2f}x agent-steps/sec{}".format(scenario_key(result), ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simulation and evolution throughput.")
+    parser.add_argument("--population", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--sensors", type=int, nargs="+", default=[9])
+    parser.add_argument("--hidden-units", type=int, nargs="+", default=[16])
+    parser.add_argument("--hidden-layers", type=int, nargs="+", default=[3])
+    parser.add_argument("--obstacles", type=int, nargs="+", default=[2, 200],
+                        help="2 is the default map, other counts are seeded random maps")
+    parser.add_argument("--generations", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load_baseline(args.compare)
+        except (OSError, ValueError) as error:
+            parser.error(str(error))
+
+    results = []
+    #one process per scenario so peak memory and warm caches don't leak between scenarios
+    with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+        for result in pool.imap(run_scenario, make_scenarios(args)):
+            print("population {population} sensors {sensors} hidden {hidden_layers}x{hidden_units} "
+                  "obstacles {obstacles}: {ticks_per_second:.0f} ticks/s, {agent_steps_per_second:.0f} "
+                  "agent-steps/s, {generations_per_second:.2f} generations/s, "
+                  "{peak_memory_mb:.0f} MB".format(**result))
+            results.append(result)
+
+    with open(args.output, "w") as file: #written first, the measurements are kept whatever the comparison does
+        json.dump({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+            "results": results
+        }, file, indent=2)
+    if baseline is not None:
+        compare(results, baseline, args.tolerance)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Latency of an exported Policy, the time of one call as a control loop would see it.
+
+Prints the p50 and p99 of single agent calls and of batched calls.
+
+    python -m benchmarks.policy_latency --batch 1 100 1000
+    python -m benchmarks.policy_latency --policy best.npz
+"""
+import argparse
+import time
+import numpy as np
+
+from src.evolutionary_neural_network.neural_network import NeuralNetwork
+from src.evolutionary_neural_network.policy import Policy
+from src.common.constants import NeuralNetworkSettings
+
+
+def measure(call, sensors, calls):
+    """
+    Returns the p50 and p99 of the duration of call(sensors), in microseconds.
+    """
+    for _ in range(100): #warm up
+        call(sensors)
+    durations = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        call(sensors)
+        durations[i] = time.perf_counter() - start
+    return np.percentile(durations, 50) * 1e6, np.percentile(durations, 99) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the latency of an exported policy.")
+    parser.add_argument("--policy", help="policy file saved by Policy.save, a random network by default")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 100])
+    parser.add_argument("--calls", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    np.random.seed(args.seed)
+    if args.policy:
+        policy = Policy.load(args.policy)
+    else:
+        policy = Policy(NeuralNetwork(
+            NeuralNetworkSettings.INPUT_UNITS,
+            NeuralNetworkSettings.HIDDEN_LAYERS,
+            NeuralNetworkSettings.HIDDEN_UNITS,
+            NeuralNetworkSettings.OUTPUTS
+        ).genome)
+    for batch in args.batch:
+        sensors = np.random.random((batch, policy.inputs))
+        if batch == 1:
+            p50, p99 = measure(policy.act, sensors[0], args.calls)
+        else:
+            p50, p99 = measure(policy.act_batch, sensors, args.calls)
+        print("batch {}: p50 {:.1f} us, p99 {:.1f} us per call".format(batch, p50, p99))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,21 @@
 import math as m #provides the mathematical fuctions for the agent's movement equations.
-import time
-import pygame #for the environment
 import numpy as np #for numerical data manipulation
 from src.agent.sensor import Sensor
 
 from src.common.math_tools import get_distance
-from src.common.constants import SimulationSettings
+from src.common.constants import SimulationSettings, AgentSettings
 
 class Agent:
 
+    #fixed attribute layout, no per instance dict, agents are many and reused across generations
+    __slots__ = ('x', 'y', 'start_x', 'start_y', 'size', 'colour', 'max_range', 'sensors', 'angle',
+                 'base_speed', 'alive', 'brain', 'fitness', 'ticks_alive', 'lifetime', 'hit_target',
+                 'best_distance', 'patience', 'stalled_ticks', 'field_of_view')
+
     deaths = 0
 
-    def __init__(self, x, y, size, field_of_view, nb_sensors, max_range, brain):
+    def __init__(self, x, y, size, field_of_view, nb_sensors, max_range, brain, lifetime=AgentSettings.LIFETIME,
+                 patience=AgentSettings.PATIENCE):
         self.x = x
         self.y = y
         self.start_x = x
@@ -19,17 +23,41 @@ class Agent:
         self.size = size
         self.colour = (255, 255, 255)
         self.max_range = max_range
+        self.field_of_view = field_of_view
         self.sensors = []
         self.angle = 0  # agent's orientation
         self.base_speed = 6
         self.alive = True
         self.brain = brain
         self.fitness = 0
-        self.time_alive = time.time() #gives the birth date of the child.
+        self.ticks_alive = 0 #number of simulation ticks the agent has lived.
+        self.lifetime = lifetime #number of ticks after which the agent dies of old age.
         self.hit_target = False  #Boolean that indicates if our agent has ever reached the destination.
         self.best_distance = 1e6 #QUESTION: why is the distance 1e6?
+        self.patience = patience #number of ticks without getting closer to the target after which the agent is culled, 0 to never cull
+        self.stalled_ticks = 0 #ticks since best_distance last improved
         self._oriente_sensors(field_of_view, nb_sensors, max_range)
-    
+
+    def reset(self, genome=None):
+        """
+        Brings the agent back to life at its starting point, so it can be reused
+        by the next generation instead of allocating a new one.
+        When a genome is given the brain takes it in place of its own.
+        """
+        self.x = self.start_x
+        self.y = self.start_y
+        self.angle = 0
+        self.alive = True
+        self.fitness = 0
+        self.ticks_alive = 0
+        self.hit_target = False
+        self.best_distance = 1e6
+        self.stalled_ticks = 0
+        for sensor in self.sensors:
+            sensor.reset()
+        if genome is not None:
+            self.brain.set_genome(genome)
+
     def _oriente_sensors(self, field_of_view, nb_sensors, max_range):
         interval = field_of_view / nb_sensors
         angle = 0
@@ -52,60 +80,42 @@ class Agent:
             self.x += self.base_speed * speed * (m.cos(m.radians(self.angle)))
             self.y += self.base_speed * speed * (m.sin(m.radians(self.angle)))
 
-    def update(self, screen, obstacles):
+    def update(self, obstacles, index=None):
         """
-        Update the agent movement, visuals and death.
+        Update the agent sensors and death. Nothing is drawn here,
+        the renderer reads the resulting state.
+        With a spatial index, only the obstacles within reach of the agent are checked.
         """
         if self.alive:
-            pygame.draw.circle(screen, self.colour,
-                               (int(self.x), int(self.y)), self.size, 0)
+            if index is not None:
+                obstacles = index.query(self.x, self.y)
+            self.ticks_alive += 1
             for sensor in self.sensors:
                 sensor.move()
-                sensor.draw_indicators(screen)
-                for obstacle in obstacles:
-                    #Obstacle in range?
-                    #Obstacle in Range!
-                    if sensor.is_in_range(obstacle):
-                        #Obstacle just joined or was in range already?
-                        if obstacle not in sensor.obstacles_in_range:
-                            sensor.obstacles_in_range.append(obstacle)
-                        #Obstacle is the new closest or no?
-                        sensor.find_draw_closest_obstacle_interaction(screen, obstacle)
-                    #Obstacle not in range!
-                    else:
-                        #Obstacle was in range and disegaged or no?
-                        if obstacle in sensor.obstacles_in_range:
-                            sensor.obstacles_in_range.remove(obstacle)
-                            #Obstacle was the closest?
-                            if sensor.glowing and sensor.glowing_obstacle_id == obstacle.id:
-                                sensor.update_distance_idglowing_disengage()
-
-                    self.check_death(obstacle)
+                sensor.sense(obstacles)
+            self.check_death(obstacles)
 
 
 
-
-    def check_death(self, obstacle):
+    def check_death(self, obstacles):
         """
-        Checks for collision between the agent and the obstacle, or
-        between agent and map boundary. If there is a collision, the agent is killed.
+        Checks for collision between the agent and the map boundary or any of the obstacles.
+        If there is a collision, the agent is killed. Agents that reached the target,
+        outlived their lifetime or stopped getting closer to the target for `patience` ticks
+        are killed as well, whether or not there are obstacles nearby. Each death is counted once.
         """
         if self.alive:
             target_distance = get_distance((self.x, self.y), SimulationSettings.TARGET_LOCATION)
-            if self.x <= 10 or self.x >= SimulationSettings.WIDTH - 20 or self.y <= 10 or self.y >= SimulationSettings.HEIGHT - 20 :
-                self.alive = False
-                Agent.deaths += 1
-            if obstacle.collided(self):
-                self.alive = False
-                Agent.deaths += 1
+            dead = self.x <= 10 or self.x >= SimulationSettings.WIDTH - 20 or self.y <= 10 or self.y >= SimulationSettings.HEIGHT - 20
             if target_distance <= self.size + 10:
-                self.alive = False
+                dead = True
                 self.hit_target = True
+            dead = dead or self.ticks_alive > self.lifetime
+            dead = dead or (self.patience and self.stalled_ticks > self.patience)
+            dead = dead or any(obstacle.collided(self) for obstacle in obstacles)
+            if dead:
+                self.alive = False
                 Agent.deaths += 1
-            if self.alive:
-                if time.time() - self.time_alive > 6:
-                    self.alive = False
-                    Agent.deaths += 1
 
     def evaluate_fitness(self):
 
@@ -114,6 +124,9 @@ class Agent:
             distance_to_target = get_distance(position, SimulationSettings.TARGET_LOCATION)
             if distance_to_target < self.best_distance:
                 self.best_distance = distance_to_target
+                self.stalled_ticks = 0
+            else:
+                self.stalled_ticks += 1
             target_factor = 1 if self.hit_target else 0
             self.fitness = (1 / distance_to_target) + 0.5 * (1 / self.best_distance) \
                 + 0.3 * target_factor
\ No newline at end of file
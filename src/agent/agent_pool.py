@@ -0,0 +1,20 @@
+class AgentPool:
+    """
+    Keeps the agents, their sensors and brains alive from one generation to the next.
+    Instead of allocating a new population every generation and leaving the old one
+    to the garbage collector, the agents are reset in place and given their new genome.
+    """
+
+    def __init__(self, agents, create_agent):
+        self.agents = list(agents)
+        self.create_agent = create_agent #builds a new agent from a genome when the pool is too small
+
+    def reset(self, genomes):
+        """
+        Returns one agent per genome, all brought back to their starting state.
+        """
+        for genome in genomes[len(self.agents):]:
+            self.agents.append(self.create_agent(genome))
+        for agent, genome in zip(self.agents, genomes):
+            agent.reset(genome)
+        return self.agents[:len(genomes)]
@@ -0,0 +1,239 @@
+import numpy as np #for numerical data manipulation
+
+from src.common.constants import SimulationSettings, AgentSettings
+from src.common.math_tools import nearest_circle_distance
+from src.common.profiling import profiler
+
+
+class PopulationState:
+    """
+    Structure of arrays holding the state of every agent of a population.
+    Instead of one Agent object per robot, positions, headings, alive masks,
+    best distances and fitness live in contiguous numpy arrays indexed by agent,
+    so the whole population is advanced with a handful of vectorized operations.
+    The equations are the same as the ones of Agent, see Agent.move,
+    Agent.check_death and Agent.evaluate_fitness.
+    The alive mask is the single record of which agents are still running: an agent
+    is resolved the tick it collides, reaches the target, outlives its lifetime or
+    goes `patience` ticks without getting closer to the target, and all_dead() is true
+    as soon as every agent is resolved.
+    """
+
+    def __init__(self, population_size, x=AgentSettings.START_X, y=AgentSettings.START_Y,
+                 size=AgentSettings.SIZE, field_of_view=AgentSettings.FIELD_OF_VIEW,
+                 nb_sensors=AgentSettings.NB_SENSORS, max_range=AgentSettings.MAX_RANGE,
+                 lifetime=AgentSettings.LIFETIME, patience=AgentSettings.PATIENCE):
+        self.population_size = population_size
+        self.start_x = x
+        self.start_y = y
+        self.size = size
+        self.max_range = max_range
+        self.lifetime = lifetime
+        self.patience = patience #ticks without improving best_distance before an agent is culled, 0 to never cull
+        self.base_speed = 6
+        self.sensor_angles = np.arange(nb_sensors) * (field_of_view / nb_sensors) #orientation of each sensor relative to the agent
+        self.x = np.empty(population_size)
+        self.y = np.empty(population_size)
+        self.angle = np.empty(population_size)
+        self.alive = np.empty(population_size, dtype=bool)
+        self.hit_target = np.empty(population_size, dtype=bool)
+        self.best_distance = np.empty(population_size)
+        self.fitness = np.empty(population_size)
+        self.ticks_alive = np.empty(population_size, dtype=np.int64)
+        self.stalled_ticks = np.empty(population_size, dtype=np.int64)
+        self.sensor_distances = np.empty((population_size, nb_sensors))
+        self.reset()
+
+    @classmethod
+    def from_agents(cls, agents):
+        """
+        Creates the state of a population of Agent objects, taking the
+        settings of the agents (size, sensors, range, lifetime, patience) from the first one.
+        """
+        agent = agents[0]
+        state = cls(len(agents), x=agent.start_x, y=agent.start_y, size=agent.size,
+                    nb_sensors=len(agent.sensors), max_range=agent.max_range, lifetime=agent.lifetime,
+                    patience=agent.patience)
+        state.sensor_angles = np.array([sensor.angle for sensor in agent.sensors], dtype=float)
+        return state
+
+    def prefix(self, count):
+        """
+        State of the first count agents, whose arrays are views into the rows of this one,
+        so a state allocated for the largest population runs smaller ones without allocating.
+        """
+        state = object.__new__(PopulationState)
+        state.__dict__.update(self.__dict__)
+        state.population_size = count
+        for name in ("x", "y", "angle", "alive", "hit_target", "best_distance", "fitness",
+                     "ticks_alive", "stalled_ticks", "sensor_distances"):
+            setattr(state, name, getattr(self, name)[:count])
+        if isinstance(self.start_x, np.ndarray): #one start per agent
+            state.start_x = self.start_x[:count]
+            state.start_y = self.start_y[:count]
+        return state
+
+    def reset(self):
+        """
+        Puts every agent back at the start, alive, for a new generation.
+        """
+        self.x[:] = self.start_x #one start for all, or one per agent
+        self.y[:] = self.start_y
+        self.angle.fill(0)
+        self.alive.fill(True)
+        self.hit_target.fill(False)
+        self.best_distance.fill(1e6)
+        self.fitness.fill(0)
+        self.ticks_alive.fill(0)
+        self.stalled_ticks.fill(0)
+        self.sensor_distances.fill(self.max_range)
+
+    def all_dead(self):
+        return not self.alive.any()
+
+    def sensor_inputs(self):
+        """
+        Sensor readings scaled down to [0, 1], one row per agent.
+        """
+        return self.sensor_distances / self.max_range
+
+    def sensor_segments(self):
+        """
+        Returns the origins and ends of every sensor, as two
+        (population_size, nb_sensors, 2) arrays, see Sensor.move.
+        """
+        radians = np.radians(self.sensor_angles[None, :] + self.angle[:, None])
+        direction = np.stack((np.cos(radians), np.sin(radians)), axis=-1)
+        centre = np.stack((self.x, self.y), axis=-1)[:, None, :]
+        origins = centre + self.size * direction
+        ends = centre + (self.size + self.max_range) * direction
+        return origins, ends
+
+    def step(self, brain_outputs, obstacles, index=None):
+        """
+        Advances every agent by one tick: movement from the outputs of the brains,
+        sensor readings, death and fitness.
+        obstacles is a list of Circle or a (centres, radii) pair of arrays.
+        When a spatial index over the obstacles is given, each agent only
+        considers the obstacles it can reach.
+        """
+        with profiler.phase("movement"):
+            self.move(brain_outputs)
+            self.ticks_alive[self.alive] += 1
+        with profiler.phase("broadphase"):
+            centres, radii = self._nearby_obstacles(obstacles, index)
+        self._sense(centres, radii)
+        with profiler.phase("check_death"):
+            self._check_death(centres, radii)
+        with profiler.phase("fitness"):
+            self.evaluate_fitness()
+
+    def move(self, brain_outputs):
+        """
+        brain_outputs is a (population_size, 2) array holding the speed and direction
+        outputs of every brain. Dead agents don't move.
+        """
+        speed = brain_outputs[:, 0]
+        angle = np.interp(brain_outputs[:, 1], [-1, 1], [-60, 60])
+        self.angle = np.where(self.alive, angle, self.angle)
+        step = np.where(self.alive, self.base_speed * speed, 0)
+        radians = np.radians(self.angle)
+        self.x += step * np.cos(radians)
+        self.y += step * np.sin(radians)
+
+    def sense(self, obstacles, index=None):
+        """
+        Sets the distance of every sensor to the closest obstacle it intersects,
+        max_range when it intersects none.
+        """
+        self._sense(*self._nearby_obstacles(obstacles, index))
+
+    def check_death(self, obstacles, index=None):
+        """
+        Kills the agents that collided with an obstacle, the map boundary or the target,
+        the ones that outlived their lifetime and the ones that stalled for longer than patience.
+        """
+        self._check_death(*self._nearby_obstacles(obstacles, index))
+
+    def _nearby_obstacles(self, obstacles, index):
+        """
+        Centres and radii of the obstacles each living agent has to consider,
+        either (K, 2) and (K,) arrays shared by all agents or, with an index,
+        (alive, K, 2) and (alive, K) arrays padded with nan.
+        The index may also give each agent the obstacles of its own map, see ScenarioObstacles.
+        """
+        if index is None:
+            return _obstacle_arrays(obstacles)
+        return index.candidates(self.x[self.alive], self.y[self.alive], np.flatnonzero(self.alive))
+
+    def _sense(self, centres, radii):
+        alive = self.alive
+        with profiler.phase("sensors"):
+            origins, ends = self.sensor_segments()
+            origins = origins[alive]
+            ends = ends[alive]
+        if profiler.enabled:
+            profiler.count("intersection_tests", origins.shape[0] * origins.shape[1] * radii.shape[-1])
+        with profiler.phase("intersections"):
+            if radii.ndim == 2: #one set of obstacles per agent, shared by all its sensors
+                centres = centres[:, None]
+                radii = radii[:, None]
+            distances = nearest_circle_distance(origins, ends, centres, radii)
+            self.sensor_distances[alive] = np.minimum(distances, self.max_range)
+
+    def _check_death(self, centres, radii):
+        alive = self.alive
+        dead = (self.x <= 10) | (self.x >= SimulationSettings.WIDTH - 20) \
+            | (self.y <= 10) | (self.y >= SimulationSettings.HEIGHT - 20)
+        squared_distances = (self.x[alive, None] - centres[..., 0])**2 + (self.y[alive, None] - centres[..., 1])**2
+        dead[alive] |= (squared_distances < (radii + self.size)**2).any(axis=1) #nan padding never collides
+        target_x, target_y = SimulationSettings.TARGET_LOCATION
+        on_target = np.hypot(self.x - target_x, self.y - target_y) <= self.size + 10
+        self.hit_target |= alive & on_target
+        dead |= on_target
+        dead |= self.ticks_alive > self.lifetime
+        if self.patience:
+            stalled = alive & ~dead & (self.stalled_ticks > self.patience)
+            if profiler.enabled:
+                profiler.count("culled", int(stalled.sum()))
+            dead |= stalled
+        self.alive = alive & ~dead
+
+    def evaluate_fitness(self):
+        alive = self.alive
+        target_x, target_y = SimulationSettings.TARGET_LOCATION
+        distance_to_target = np.hypot(self.x[alive] - target_x, self.y[alive] - target_y)
+        previous_best = self.best_distance[alive]
+        best_distance = np.minimum(previous_best, distance_to_target)
+        self.best_distance[alive] = best_distance
+        self.stalled_ticks[alive] = np.where(best_distance < previous_best, 0, self.stalled_ticks[alive] + 1)
+        self.fitness[alive] = (1 / distance_to_target) + 0.5 * (1 / best_distance) \
+            + 0.3 * self.hit_target[alive]
+
+    def write_back(self, agents):
+        """
+        Copies the state of every agent to its Agent object,
+        so the genetic algorithm can read the fitness as usual.
+        """
+        for i, agent in enumerate(agents):
+            agent.x = float(self.x[i])
+            agent.y = float(self.y[i])
+            agent.angle = float(self.angle[i])
+            agent.alive = bool(self.alive[i])
+            agent.hit_target = bool(self.hit_target[i])
+            agent.best_distance = float(self.best_distance[i])
+            agent.fitness = float(self.fitness[i])
+            agent.ticks_alive = int(self.ticks_alive[i])
+            agent.stalled_ticks = int(self.stalled_ticks[i])
+
+
+def _obstacle_arrays(obstacles):
+    """
+    Centres and radii of the obstacles as (K, 2) and (K,) arrays.
+    obstacles is a list of Circle, or already a (centres, radii) pair of arrays.
+    """
+    if isinstance(obstacles, tuple):
+        return obstacles
+    centres = np.array([(obstacle.x, obstacle.y) for obstacle in obstacles], dtype=float).reshape(-1, 2)
+    radii = np.array([obstacle.r for obstacle in obstacles], dtype=float)
+    return centres, radii
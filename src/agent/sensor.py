@@ -1,4 +1,3 @@
-import pygame
 import math as m
 
 from src.common.math_tools import get_distance
@@ -16,7 +15,10 @@ class Sensor:
     It's ultimate task is to provide the closest distance to collision
     """
 
-    def __init__(self, agent, angle, max_range, tag):
+    __slots__ = ('agent', 'angle', 'max_range', 'distance', 'tag', 'x0', 'y0', 'x1', 'y1', 'origin', 'end',
+                 'glowing', 'glowing_obstacle_id', 'intersection', 'track_obstacles', 'obstacles_in_range')
+
+    def __init__(self, agent, angle, max_range, tag, track_obstacles=False):
         self.agent = agent
         self.angle = angle
         self.max_range = max_range
@@ -27,8 +29,20 @@ class Sensor:
         self.end = (self.x1, self.y1)
         self.glowing = False #True if an interaction with an obstacle is drawn
         self.glowing_obstacle_id = None #the id of the obstacle that caused the glowing of the environment in case there's one.
+        self.intersection = None #closest intersection point, only read by the renderer
+        self.track_obstacles = track_obstacles #True to keep the display only list of obstacles in range
         self.obstacles_in_range = [] #list all obstacles in range of the environment
 
+    def reset(self):
+        """
+        Clears the readings of the sensor for a new life of its agent.
+        """
+        self.distance = self.max_range
+        self.glowing = False
+        self.glowing_obstacle_id = None
+        self.intersection = None
+        self.obstacles_in_range.clear()
+
     def move(self):
         """
         Updates the position of the environment in accordance with the position of the agent,
@@ -46,80 +60,26 @@ class Sensor:
         self.end = (self.x1, self.y1)
 
 
-    def draw_indicators(self, screen):
-        """
-        Draws one line that is an extension of a environment to give a visual indication of the robot orientation.
-        You can change which environment by choosing a number from 0 to Number_Sensors for thr tag, but it doesn't actually matter which one.
-        """
-        if self.tag == 0:
-            pygame.draw.line(screen, (0, 0, 0), (self.agent.x, self.agent.y), (self.x0, self.y0))
-
+    def sense(self, obstacles):
         """
-        Display end points of the environment. (uncomment to see)
+        Sets the distance to the closest obstacle intersecting the sensor,
+        solving the intersection of each obstacle only once.
+        The glowing state, the intersection point and the list of obstacles in range
+        are only needed for display, they are kept up to date when track_obstacles is set.
         """
-        #if not self.glowing:
-             #pygame.draw.circle(screen, (0, 255, 0), (int(self.x1), int(self.y1)), 1, 0)
-
-
-    def find_draw_closest_obstacle_interaction(self, screen, obstacle):
-
-        '''
-        if :
-        checks if the current obstacle id contains the id of the closest obstacle and handles it if not.
-        Keeps doing it until he reaches the other condition.
-        else :
-        takes the obstacle's id, activates the environment, draws its line and intersection point.
-        '''
-
-        #Sensor glowing because of another obstacle?
-        if  self.glowing_obstacle_id  and self.glowing_obstacle_id != obstacle.id :
-            self._choose_closer_obstacle(obstacle)
-
-        #already glowing because of this obstacle? or Sensor not glowing (glowing_id = None)
-        else:
+        self.distance = self.max_range
+        self.intersection = None
+        self.glowing_obstacle_id = None
+        if self.track_obstacles:
+            self.obstacles_in_range = []
+        for obstacle in obstacles:
             intersection_point = obstacle.intersection_point(self)
-            self.glowing_obstacle_id = obstacle.id
-            self.glowing = True
-            self.distance = get_distance(self.origin, intersection_point)
-            pygame.draw.line(screen, (255, 0, 0), self.origin, intersection_point)
-            pygame.draw.circle(screen, (0, 255, 0), intersection_point, 1, 0) #indicates intersectionn point
-
-
-    def _choose_closer_obstacle(self, obstacle):
-        intersection_point = obstacle.intersection_point(self)
-        new_distance = get_distance((self.x0, self.y0), intersection_point)
-        if new_distance < self.distance:
-            self.glowing_obstacle_id = obstacle.id
-            self.distance = new_distance
-
-
-    def update_distance_idglowing_disengage(self):
-        """
-        Turn off the glowing red of the closest engaged obstacle after disengagement.
-        """
-        if len(self.obstacles_in_range) >= 1:
-            distances = []
-            for obstacle in self.obstacles_in_range:
-                intersection_point = obstacle.intersection_point(self)
+            if intersection_point:
                 distance = get_distance(self.origin, intersection_point)
-                distances.append(distance)
-            lowest = distances.index(min(distances))
-            self.distance = distances[lowest]
-
-        else:
-            self.glowing = False
-            self.distance = self.max_range
-        self.glowing_obstacle_id = None
-
-
-
-
-    def is_in_range(self, obstacle):
-        """
-        Return true if the obstacle is in range and false otherwise.
-        """
-        intersection_point = obstacle.intersection_point(self)
-        if intersection_point:
-            return True
-        else:
-            return False
\ No newline at end of file
+                if distance < self.distance:
+                    self.distance = distance
+                    self.intersection = intersection_point
+                    self.glowing_obstacle_id = obstacle.id
+                if self.track_obstacles:
+                    self.obstacles_in_range.append(obstacle)
+        self.glowing = self.intersection is not None
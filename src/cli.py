@@ -0,0 +1,347 @@
+"""
+Command line entry point of the project, see `python run.py --help`.
+
+Only argparse and the settings are imported up front, numpy, the simulation and pygame
+are imported by the mode that needs them, and pygame only when a window is opened.
+Settings come from the defaults of src/common/constants.py, a json file (--config)
+and `section.NAME=value` overrides (--set), so differently configured runs are launched
+without editing the source:
+
+    python run.py --headless --config big.json --set evolution.MUTATION_RATE=0.01
+"""
+import argparse
+import json
+import os
+
+from src.common.settings import Settings
+
+#how a run evolves, see mode(), and what it's called in error messages
+MODES = {
+    "window": "when watching in a window",
+    "headless": "with --headless",
+    "workers": "with --workers",
+    "scenarios": "with --scenarios",
+    "islands": "with --islands"
+}
+
+#options that only apply to some modes, the other ones apply to all
+OPTION_MODES = {
+    "fast_forward": ("window",),
+    "render_every": ("window",),
+    "top_k": ("window",),
+    "rays_top_k": ("window",),
+    "stream": ("window", "headless"),
+    "stream_every": ("window", "headless"),
+    "record": ("window", "headless"),
+    "record_every": ("window", "headless"),
+    "profile": ("window", "headless"),
+    "trajectories": ("window", "headless", "workers"),
+    "checkpoint": ("window", "headless", "workers", "scenarios"),
+    "checkpoint_every": ("window", "headless", "workers", "scenarios"),
+    "memmap": ("window", "headless", "workers", "scenarios"),
+    "resume": ("window", "headless", "workers", "scenarios"),
+    "scenario_seed": ("scenarios",),
+    "scenario_obstacles": ("scenarios",),
+    "aggregate": ("scenarios",),
+    "fitness_cache": ("scenarios",),
+    "generations": ("islands",),
+    "migration_interval": ("islands",),
+    "migrants": ("islands",),
+    "mutation_rates": ("islands",),
+    "islands_results": ("islands",)
+}
+
+
+def at_least(minimum):
+    """
+    argparse type of the integers no smaller than minimum.
+    """
+    def parse(value):
+        number = int(value)
+        if number < minimum:
+            raise argparse.ArgumentTypeError("expected an integer of at least {}, got {}".format(minimum, value))
+        return number
+    return parse
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Evolve collision avoiding agents.")
+    parser.add_argument("--config", metavar="PATH", help="json file of settings, see src/common/settings.py")
+    parser.add_argument("--set", action="append", default=[], metavar="SECTION.NAME=VALUE",
+                        help="override one setting, e.g. evolution.POPULATION_SIZE=500, can be repeated")
+    parser.add_argument("--show-settings", action="store_true", help="print the settings of the run and exit")
+    parser.add_argument("--headless", action="store_true", help="run without a display")
+    parser.add_argument("--fast-forward", action="store_true", help="step as fast as possible while drawing")
+    parser.add_argument("--render-every", type=at_least(1), default=1, metavar="TICKS", help="draw one tick out of TICKS")
+    parser.add_argument("--top-k", type=int, metavar="K", help="only draw the K fittest living agents")
+    parser.add_argument("--rays-top-k", type=int, metavar="K", help="only draw the sensor rays of the K fittest drawn agents")
+    parser.add_argument("--stream", nargs="?", const="collision_avoidance_stream", metavar="NAME",
+                        help="publish the state in shared memory for src/simulation/viewer.py")
+    parser.add_argument("--stream-every", type=at_least(1), default=1, metavar="TICKS", help="publish one tick out of TICKS")
+    parser.add_argument("--record", metavar="PATH", help="record every tick to this file for src/simulation/replay.py")
+    parser.add_argument("--record-every", type=at_least(1), default=1, metavar="GENERATIONS",
+                        help="record one generation out of GENERATIONS")
+    parser.add_argument("--profile", type=int, default=0, metavar="TICKS",
+                        help="time every phase of a tick and print a summary every TICKS ticks")
+    parser.add_argument("--workers", type=int, default=0, help="evaluate generations headless on this many processes")
+    parser.add_argument("--scenarios", type=int, default=0,
+                        help="evaluate every genome on this many seeded courses, phases and starts")
+    parser.add_argument("--scenario-seed", type=int, default=0)
+    parser.add_argument("--scenario-obstacles", type=int, default=20, help="obstacles of each random scenario")
+    parser.add_argument("--aggregate", choices=["mean", "min"], default="mean",
+                        help="how the fitness of the scenarios of a genome are combined")
+    parser.add_argument("--fitness-cache", type=int, default=0, metavar="GENOMES",
+                        help="remember the fitness of this many genomes, skipping clones (with --scenarios)")
+    parser.add_argument("--selection", choices=["truncation", "roulette", "rank", "tournament", "sus"],
+                        default="truncation", help="how the parents of the next generation are chosen")
+    parser.add_argument("--tournament-size", type=int, default=3)
+    parser.add_argument("--export-policy", metavar="PATH",
+                        help="save the brain of the fittest agent to this .npz file after every generation")
+    parser.add_argument("--islands", type=int, default=0, help="evolve this many populations on separate processes")
+    parser.add_argument("--generations", type=int, default=100, help="generations evolved by each island")
+    parser.add_argument("--migration-interval", type=at_least(1), default=10, metavar="GENERATIONS")
+    parser.add_argument("--migrants", type=at_least(0), default=2, help="genomes sent to the next island at each migration")
+    parser.add_argument("--islands-results", metavar="PATH",
+                        help="save the best genome and fitness history of every island to this .npz file")
+    parser.add_argument("--mutation-rates", type=float, nargs="+",
+                        help="mutation rates given to the islands in turn, evolution.MUTATION_RATE by default")
+    parser.add_argument("--checkpoint", metavar="PATH", help="save the evolution to this .npz file")
+    parser.add_argument("--checkpoint-every", type=int, default=10, metavar="GENERATIONS")
+    parser.add_argument("--memmap", action="store_true", help="keep the checkpointed genomes in a memory-mapped file")
+    parser.add_argument("--resume", action="store_true", help="start from the checkpoint if it exists")
+    parser.add_argument("--trajectories", action="store_true",
+                        help="precompute the motion of the obstacles into a table shared by the evaluators")
+    return parser
+
+
+def mode(args):
+    """
+    How the run evolves: on islands, on scenarios, on workers, or stepping the
+    simulation in a window or headless.
+    """
+    modes = [name for name in ("islands", "scenarios", "workers") if getattr(args, name)]
+    return modes[0] if modes else ("headless" if args.headless else "window")
+
+
+def check_options(parser, args):
+    """
+    Rejects combinations of options where some would be silently ignored:
+    two modes at once, options of another mode, and options of options that are missing.
+    """
+    modes = [name for name in ("islands", "scenarios", "workers") if getattr(args, name)]
+    if len(modes) > 1:
+        parser.error("--{} and --{} are different ways to evolve, pick one".format(*modes[:2]))
+    current = mode(args)
+    for name, allowed in OPTION_MODES.items():
+        if getattr(args, name) != parser.get_default(name) and current not in allowed:
+            parser.error("--{} does not apply {}".format(name.replace("_", "-"), MODES[current]))
+    for name in ("checkpoint_every", "memmap", "resume"):
+        if getattr(args, name) != parser.get_default(name) and not args.checkpoint:
+            parser.error("--{} needs --checkpoint".format(name.replace("_", "-")))
+    if args.tournament_size != parser.get_default("tournament_size") and args.selection != "tournament":
+        parser.error("--tournament-size needs --selection tournament")
+
+
+def create_evolution(settings, selection=None, cache=None):
+    """
+    The first generation and the genetic algorithm evolving it, as the settings describe them.
+    """
+    from src.evolutionary_neural_network.create_population import create_population
+    from src.evolutionary_neural_network.genetic import Genetic
+    evolution = settings.evolution
+    return Genetic(
+        create_population(evolution.POPULATION_SIZE, settings=settings),
+        evolution.ELITISM,
+        evolution.MUTATION_RATE,
+        evolution.POPULATION_SIZE,
+        cache=cache,
+        selection=selection
+    )
+
+
+def create_selection(name, elitism, tournament_size=3):
+    from src.evolutionary_neural_network.selection import SELECTIONS, TournamentSelection, TruncationSelection
+    if name == "truncation":
+        return TruncationSelection(elitism)
+    if name == "tournament":
+        return TournamentSelection(tournament_size)
+    return SELECTIONS[name]()
+
+
+def export_policy(evolution, path):
+    """
+    Saves the brain of the fittest agent of the last generation as a Policy.
+    """
+    from src.evolutionary_neural_network.policy import Policy
+    brain = evolution.population[0].brain
+    Policy(evolution.elite_genomes[-1], brain.inputs, brain.hidden_layers, brain.hidden_units, brain.outputs).save(path)
+
+
+def run_evaluator(evolution, evaluator, checkpointer=None, policy=None):
+    """
+    Evolves headless, each generation being evaluated at once by the evaluator.
+    """
+    evolution.evaluator = evaluator
+    try:
+        while True:
+            evolution.evaluate()
+            evolution.make_next_generation()
+            print("generation", evolution.generation, "best fitness", evolution.fitness_history[-1][0])
+            if evolution.cache is not None:
+                print(evolution.cache.summary())
+            if policy:
+                export_policy(evolution, policy)
+            if checkpointer:
+                checkpointer.maybe_save(evolution, ticks=evolution.evaluator.ticks)
+    finally:
+        evolution.evaluator.close()
+        if checkpointer:
+            checkpointer.wait()
+
+
+def run_parallel(evolution, workers, checkpointer=None, ticks=0, trajectories=None, policy=None):
+    """
+    Evolves headless, evaluating each generation on a pool of worker processes.
+    """
+    from src.evolutionary_neural_network.parallel_evaluation import ParallelEvaluator
+    evaluator = ParallelEvaluator(workers, trajectories=trajectories)
+    evaluator.ticks = ticks
+    run_evaluator(evolution, evaluator, checkpointer, policy)
+
+
+def run_scenarios(evolution, nb_scenarios, seed, nb_obstacles, aggregate, checkpointer=None, policy=None):
+    """
+    Evolves headless, evaluating every genome on several seeded scenarios at once.
+    """
+    from src.environment.scenarios import create_scenarios
+    from src.evolutionary_neural_network.scenario_evaluation import ScenarioEvaluator
+    evaluator = ScenarioEvaluator(create_scenarios(nb_scenarios, seed, nb_obstacles), aggregate)
+    run_evaluator(evolution, evaluator, checkpointer, policy)
+
+
+def run_islands(settings, nb_islands, generations, migration_interval, migrants, mutation_rates, selection=None,
+                policy=None, results_path=None):
+    """
+    Evolves headless on several islands, one process each, with periodic migration.
+    The brain of the fittest agent of all the islands is saved as a Policy to the policy path,
+    and the best genome and fitness history of every island to the results path, if given.
+    """
+    import numpy as np #Library for Numerical Data Manipulation
+    from src.evolutionary_neural_network.islands import Island, IslandModel
+    from src.evolutionary_neural_network.policy import Policy
+    islands = [Island(seed=i, mutation_rate=mutation_rates[i % len(mutation_rates)]) for i in range(nb_islands)]
+    results = IslandModel(islands, migration_interval, migrants, settings.evolution.POPULATION_SIZE,
+                          settings.evolution.ELITISM, settings, selection).run(generations)
+    best = max(range(len(results)), key=lambda i: results[i]["fitness_history"][-1][0])
+    print("fittest island", best, "best fitness", results[best]["fitness_history"][-1][0])
+    if policy:
+        Policy(results[best]["best_genome"], *results[best]["architecture"]).save(policy)
+    if results_path:
+        np.savez(results_path,
+                 best_genomes=np.array([result["best_genome"] for result in results]),
+                 fitness_histories=np.array([result["fitness_history"] for result in results], dtype=float),
+                 mutation_rates=np.array([island.mutation_rate for island in islands]),
+                 architecture=np.array(results[best]["architecture"]))
+
+
+def run(evolution, obstacles, settings, headless=False, fast_forward=False, checkpointer=None, ticks=0,
+        trajectories=None, render_every=1, top_k=None, rays_top_k=None, stream=None, stream_every=1,
+        record=None, record_every=1, policy=None):
+    """
+    Begins the simulation. In headless mode nothing is drawn and pygame is never imported.
+    The clock runs in real time when watching, unless fast-forwarded,
+    and always as fast as possible when headless.
+    With a stream name the state is published for src/simulation/viewer.py,
+    with a record path it is recorded for src/simulation/replay.py.
+    """
+    from src.simulation.clock import SimulationClock
+    from src.simulation.engine import Simulation
+    clock = SimulationClock(settings.simulation.FPS, fast_forward=headless or fast_forward)
+    simulation = Simulation(evolution, obstacles, clock, trajectories, ticks)
+    if stream:
+        from src.simulation.stream import StateStream
+        simulation.stream = StateStream.create(simulation, stream, publish_every=stream_every)
+    if record:
+        from src.simulation.recording import Recorder
+        simulation.recorder = Recorder(record, simulation, record_every)
+    renderer = None
+    if not headless:
+        from src.simulation.renderer import Renderer
+        renderer = Renderer(render_every=render_every, top_k=top_k, rays_top_k=rays_top_k)
+    running = True
+    try:
+        while running:
+            if renderer and not renderer.handle_events(simulation):
+                running = False
+            if simulation.step():
+                print("generation", simulation.generation)
+                if policy:
+                    export_policy(evolution, policy)
+                if checkpointer:
+                    checkpointer.maybe_save(evolution, simulation.tick)
+            if renderer:
+                renderer.draw(simulation)
+    finally:
+        if renderer:
+            renderer.close()
+        if simulation.stream:
+            simulation.stream.close()
+        if simulation.recorder:
+            simulation.recorder.close()
+        if checkpointer:
+            checkpointer.wait()
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        settings = Settings.load(args.config, args.set)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    check_options(parser, args)
+    if args.show_settings:
+        print(json.dumps(settings.as_dict(), indent=2))
+        return
+    selection = create_selection(args.selection, settings.evolution.ELITISM, args.tournament_size)
+    if args.islands:
+        run_islands(settings, args.islands, args.generations, args.migration_interval, args.migrants,
+                    args.mutation_rates or [settings.evolution.MUTATION_RATE], selection, args.export_policy,
+                    args.islands_results)
+        return
+
+    from src.common.profiling import profiler
+    from src.environment.create_map import create_map
+    from src.evolutionary_neural_network.checkpoint import Checkpointer, load_checkpoint, restore
+    cache = None
+    if args.fitness_cache:
+        from src.evolutionary_neural_network.fitness_cache import FitnessCache
+        cache = FitnessCache(args.fitness_cache)
+    evolution = create_evolution(settings, selection, cache)
+    obstacles = create_map()
+    if args.profile:
+        profiler.enable(report_every=args.profile)
+    checkpointer = None
+    ticks = 0
+    if args.checkpoint:
+        checkpointer = Checkpointer(args.checkpoint, args.checkpoint_every, args.memmap)
+        if args.resume and os.path.exists(args.checkpoint):
+            try:
+                ticks = restore(evolution, load_checkpoint(args.checkpoint), obstacles)
+            except ValueError as error: #a checkpoint of other settings
+                parser.error("can't resume {}: {}".format(args.checkpoint, error))
+            print("resumed at generation", evolution.generation)
+    trajectories = None
+    if args.trajectories:
+        from src.environment.trajectory import ObstacleTrajectories
+        trajectories = ObstacleTrajectories.compile(create_map()) #from the start of the map, whatever was resumed
+    if args.scenarios:
+        run_scenarios(evolution, args.scenarios, args.scenario_seed, args.scenario_obstacles, args.aggregate,
+                      checkpointer, args.export_policy)
+    elif args.workers:
+        run_parallel(evolution, args.workers, checkpointer, ticks, trajectories, args.export_policy)
+    else:
+        run(evolution, obstacles, settings, headless=args.headless, fast_forward=args.fast_forward,
+            checkpointer=checkpointer, ticks=ticks, trajectories=trajectories, render_every=args.render_every,
+            top_k=args.top_k, rays_top_k=args.rays_top_k, stream=args.stream, stream_every=args.stream_every,
+            record=args.record, record_every=args.record_every, policy=args.export_policy)
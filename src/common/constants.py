@@ -3,6 +3,8 @@ class SimulationSettings:
     (WIDTH, HEIGHT) = (1000, 600)
     TARGET_LOCATION = (800, 300)
     CAPTION = "Genetic Simulation"
+    FPS = 60 #ticks per second when the simulation is not fast-forwarded
+    BROADPHASE_THRESHOLD = 16 #maps with at least this many obstacles use a spatial index
 
 class AgentSettings:
     START_X = 175
@@ -11,6 +13,13 @@ class AgentSettings:
     FIELD_OF_VIEW = 360
     NB_SENSORS = 9
     MAX_RANGE = 75
+    LIFETIME = 360 #maximum number of ticks an agent can live, 6 seconds at 60 FPS
+    PATIENCE = 120 #agents whose best distance hasn't improved for this many ticks are culled, 0 to never cull
+
+class ObstacleSettings:
+    SPEED = 0.5 #pixels travelled per tick
+    TOP = 150
+    BOTTOM = 450
 
 class EvolutionSettings:
     POPULATION_SIZE = 100
@@ -1,4 +1,5 @@
 import math as m
+import numpy as np
 #Math that I didn't try to understand and chose just to work with.
 
 def circle_line_intersection(S, E, C, r):
@@ -36,3 +37,31 @@ def get_distance(vec_1, vec_2):
     dx = vec_2[0] - vec_1[0]
     dy = vec_2[1] - vec_1[1]
     return m.sqrt((dx**2) + (dy**2))
+
+
+def segment_circle_distances(origins, ends, centres, radii):
+    """
+    Vectorized circle_line_intersection for many segments and many circles at once.
+    origins and ends : (..., 2) arrays of segment starts and ends.
+    centres and radii : (..., K, 2) and (..., K) arrays of circles, broadcast against the segments.
+    Returns a (..., K) array holding the distance from the start of each segment to its first
+    intersection with each circle, inf when the segment misses the circle.
+    """
+    d = (ends - origins)[..., None, :]
+    f = origins[..., None, :] - centres
+    a = np.einsum('...i,...i', d, d)
+    b = 2 * np.einsum('...i,...i', d, f)
+    c = np.einsum('...i,...i', f, f) - radii**2
+    discriminant = b*b - 4*a*c
+    with np.errstate(invalid='ignore'):
+        t_1 = (-b - np.sqrt(discriminant)) / (2*a) #only interested in t_1, nan when there's no intersection
+    hit = (t_1 >= 0) & (t_1 <= 1)
+    return np.where(hit, t_1 * np.sqrt(a), np.inf)
+
+
+def nearest_circle_distance(origins, ends, centres, radii):
+    """
+    Distance from the start of each segment to the closest circle it intersects,
+    inf if it intersects none. Same arguments as segment_circle_distances.
+    """
+    return segment_circle_distances(origins, ends, centres, radii).min(axis=-1, initial=np.inf)
@@ -0,0 +1,95 @@
+import time
+from contextlib import nullcontext
+from collections import defaultdict
+
+
+class Profiler:
+    """
+    Cumulative timers and counters for the phases of a simulation tick
+    (obstacle motion, sensors, intersection tests, brains, deaths, fitness, rendering, breeding).
+    It can be switched on and off at runtime. When off, phase() hands back a shared no-op
+    context and count() returns straight away, so the instrumented hot paths cost next to nothing.
+    When on, a summary is dumped every `report_every` ticks.
+    """
+
+    _off = nullcontext() #shared by every phase while disabled
+
+    def __init__(self, enabled=False, report_every=0, report=print):
+        self.enabled = enabled
+        self.report_every = report_every #ticks between two summaries, 0 to never dump one
+        self.report = report #where the summaries go
+        self.reset()
+
+    def reset(self):
+        self.timers = defaultdict(float) #seconds spent in each phase
+        self.calls = defaultdict(int) #number of times each phase ran
+        self.counters = defaultdict(int)
+        self.ticks = 0
+
+    def enable(self, report_every=None):
+        if report_every is not None:
+            self.report_every = report_every
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def toggle(self):
+        self.enabled = not self.enabled
+
+    def phase(self, name):
+        """
+        Context manager timing the code it wraps under the given phase name.
+        """
+        if not self.enabled:
+            return Profiler._off
+        return _Timer(self, name)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] += amount
+
+    def tick(self):
+        """
+        Marks the end of a simulation tick, dumping a summary when one is due.
+        """
+        if not self.enabled:
+            return
+        self.ticks += 1
+        if self.report_every and self.ticks % self.report_every == 0:
+            self.report(self.summary())
+
+    def summary(self):
+        """
+        Returns a table of the time spent in every phase, and of the counters
+        with their average per tick.
+        """
+        total = sum(self.timers.values()) or 1
+        lines = ["{} ticks profiled".format(self.ticks)]
+        for name, seconds in sorted(self.timers.items(), key=lambda item: -item[1]):
+            calls = self.calls[name]
+            lines.append("  {:<18} {:9.3f} s {:6.1f} % {:10.1f} us/call {:9d} calls".format(
+                name, seconds, 100 * seconds / total, 1e6 * seconds / calls, calls))
+        for name, value in sorted(self.counters.items()):
+            lines.append("  {:<18} {:12d} total {:14.1f} per tick".format(name, value, value / max(self.ticks, 1)))
+        return "\n".join(lines)
+
+
+class _Timer:
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.timers[self.name] += time.perf_counter() - self.start
+        self.profiler.calls[self.name] += 1
+        return False
+
+
+profiler = Profiler() #shared by the engine, the population state, the renderer and the genetic algorithm
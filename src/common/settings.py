@@ -0,0 +1,131 @@
+import json
+
+from src.common.constants import SimulationSettings, AgentSettings, EvolutionSettings, NeuralNetworkSettings
+
+#settings that can be tuned per run, by section, the classes of constants.py hold their defaults
+TUNABLE = {
+    "simulation": (SimulationSettings, ("FPS",)),
+    "agent": (AgentSettings, ("START_X", "START_Y", "SIZE", "FIELD_OF_VIEW", "NB_SENSORS", "MAX_RANGE",
+                              "LIFETIME", "PATIENCE")),
+    "evolution": (EvolutionSettings, ("POPULATION_SIZE", "ELITISM", "MUTATION_RATE")),
+    "neural_network": (NeuralNetworkSettings, ("HIDDEN_UNITS", "HIDDEN_LAYERS"))
+}
+
+#smallest value of the settings that have one, the code can't run below it
+MINIMUM = {
+    ("simulation", "FPS"): 1,
+    ("agent", "SIZE"): 1,
+    ("agent", "NB_SENSORS"): 1,
+    ("agent", "MAX_RANGE"): 1,
+    ("agent", "LIFETIME"): 1,
+    ("agent", "PATIENCE"): 0,
+    ("evolution", "POPULATION_SIZE"): 1,
+    ("evolution", "ELITISM"): 1,
+    ("evolution", "MUTATION_RATE"): 0,
+    ("neural_network", "HIDDEN_UNITS"): 1,
+    ("neural_network", "HIDDEN_LAYERS"): 1
+}
+
+
+class Section:
+    """
+    The settings of one section, read like the matching class of constants.py
+    (settings.agent.LIFETIME reads like AgentSettings.LIFETIME), so code taking
+    either one doesn't need to know which it got.
+    """
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+    def __repr__(self):
+        return "Section({})".format(self.__dict__)
+
+
+class Settings:
+    """
+    Settings of one run: the defaults of constants.py, then the values of a json file
+    ({"evolution": {"POPULATION_SIZE": 500}}), then `section.NAME=value` overrides.
+    The settings object is built once by the command line and handed to the code
+    that creates the population, the genetic algorithm, the evaluators and the clock.
+    ELITISM follows POPULATION_SIZE unless it is set, the brains have one input per agent.NB_SENSORS
+    and always two outputs, speed and direction. Values of the wrong type, integer settings given
+    a fraction and values the code can't run with are errors.
+    """
+
+    def __init__(self, values=None):
+        self._set = set() #(section, name) set explicitly, the others may be derived
+        for section, (defaults, names) in TUNABLE.items():
+            setattr(self, section, Section({name: getattr(defaults, name) for name in names}))
+        self.update(values or {})
+
+    @classmethod
+    def load(cls, path=None, overrides=()):
+        """
+        Settings from an optional json file and a list of `section.NAME=value` overrides.
+        """
+        settings = cls()
+        if path:
+            with open(path) as file:
+                settings.update(json.load(file))
+        for override in overrides:
+            settings.update(parse_override(override))
+        return settings
+
+    def update(self, values):
+        """
+        Sets the values of a {section: {NAME: value}} dict, unknown names are an error.
+        """
+        for section, names in values.items():
+            if section not in TUNABLE:
+                raise ValueError("unknown settings section {!r}, expected one of {}".format(section, ", ".join(TUNABLE)))
+            for name, value in names.items():
+                if name not in TUNABLE[section][1]:
+                    raise ValueError("unknown setting {}.{}, expected one of {}".format(
+                        section, name, ", ".join(TUNABLE[section][1])))
+                setattr(getattr(self, section), name, _coerce(section, name, value))
+                self._set.add((section, name))
+        if ("evolution", "ELITISM") not in self._set:
+            self.evolution.ELITISM = max(1, int(self.evolution.POPULATION_SIZE / 10))
+        for (section, name), minimum in MINIMUM.items():
+            if getattr(getattr(self, section), name) < minimum:
+                raise ValueError("{}.{} must be at least {}, got {}".format(
+                    section, name, minimum, getattr(getattr(self, section), name)))
+        if self.evolution.MUTATION_RATE > 1:
+            raise ValueError("evolution.MUTATION_RATE is a probability, got {}".format(self.evolution.MUTATION_RATE))
+        if self.evolution.ELITISM > self.evolution.POPULATION_SIZE:
+            raise ValueError("evolution.ELITISM ({}) can't exceed evolution.POPULATION_SIZE ({})".format(
+                self.evolution.ELITISM, self.evolution.POPULATION_SIZE))
+
+    def as_dict(self):
+        return {section: dict(vars(getattr(self, section))) for section in TUNABLE}
+
+
+def _coerce(section, name, value):
+    """
+    The value in the type of the default of the setting. Integer settings only take
+    integral values, 1.5 is an error rather than 1.
+    """
+    default = getattr(TUNABLE[section][0], name)
+    if isinstance(default, tuple):
+        return tuple(value)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError("{}.{} must be a number, got {!r}".format(section, name, value))
+    if isinstance(default, int) and value != int(value):
+        raise ValueError("{}.{} must be an integer, got {}".format(section, name, value))
+    return type(default)(value)
+
+
+def parse_override(override):
+    """
+    Turns "section.NAME=value" into {section: {NAME: value}}, the value being read as json
+    when it can be (numbers, lists) and as a string otherwise.
+    """
+    key, separator, value = override.partition("=")
+    section, dot, name = key.partition(".")
+    if not separator or not dot:
+        raise ValueError("expected section.NAME=value, got {!r}".format(override))
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    return {section: {name: value}}
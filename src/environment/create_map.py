@@ -1,4 +1,7 @@
+import random
+
 from src.environment.obstacle import Circle
+from src.common.constants import SimulationSettings, AgentSettings, ObstacleSettings
 
 def create_map():
     """
@@ -12,3 +15,27 @@ def create_map():
     obstacles.append(Circle(500, 300, 85, (0, 0, 255), 2))
 
     return obstacles
+
+
+def create_random_map(nb_obstacles, seed=None, min_radius=5, max_radius=25, moving_ratio=0.2, start=None):
+    """
+    Returns a dense, procedurally generated obstacle course of nb_obstacles circles.
+    The same seed always gives the same course. The start of the agents and the target
+    are kept clear, and only a moving_ratio share of the obstacles oscillate.
+    Obstacles placed out of the [TOP, BOTTOM] band of ObstacleSettings stay still,
+    Circle.move would send them away from it for good.
+    start is where the agents start, AgentSettings.START_X and START_Y by default.
+    """
+    rng = random.Random(seed)
+    (width, height) = SimulationSettings.WIDTH, SimulationSettings.HEIGHT
+    clearings = [start if start else (AgentSettings.START_X, AgentSettings.START_Y), SimulationSettings.TARGET_LOCATION]
+    obstacles = []
+    while len(obstacles) < nb_obstacles:
+        r = rng.uniform(min_radius, max_radius)
+        x = rng.uniform(10 + r, width - 20 - r)
+        y = rng.uniform(10 + r, height - 20 - r)
+        if any((x - cx)**2 + (y - cy)**2 < (r + 4 * AgentSettings.SIZE)**2 for cx, cy in clearings):
+            continue
+        moving = rng.random() < moving_ratio and ObstacleSettings.TOP <= y <= ObstacleSettings.BOTTOM
+        obstacles.append(Circle(x, y, r, (0, 0, 255), len(obstacles) + 1, moving=moving))
+    return obstacles
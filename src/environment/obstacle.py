@@ -1,12 +1,11 @@
-import pygame
-
 from src.common.math_tools import circle_line_intersection, get_distance
+from src.common.constants import ObstacleSettings
 
 class Circle:
     """
     Circle class which serves as an obstacles.
     """
-    def __init__(self, x, y, r, colour, id):
+    def __init__(self, x, y, r, colour, id, moving=True):
         self.x = x
         self.y = y
         self.r = r
@@ -15,28 +14,24 @@ class Circle:
         self.reached_top = False
         self.reached_bottom = False
         self.direction = 1
+        self.speed = ObstacleSettings.SPEED if moving else 0 #pixels per tick
 
-    def draw(self, screen):
-        """
-        Draws the circle on to the screen.
-        """
-        pygame.draw.circle(screen, self.colour, (self.x, self.y), self.r, 0)
-
-    def move(self):
+    def move(self, ticks=1):
         """
         Makes the circle oscillate back and forth in the y
-        axis.
+        axis, by `speed` pixels for every simulation tick.
         """
-        if self.y > 450 and not self.reached_bottom:
-            self.direction *= -1
-            self.reached_top = False
-            self.reached_bottom = True
+        for _ in range(ticks):
+            if self.y > ObstacleSettings.BOTTOM and not self.reached_bottom:
+                self.direction *= -1
+                self.reached_top = False
+                self.reached_bottom = True
 
-        if self.y < 150 and not self.reached_top:
-            self.direction *= -1
-            self.reached_top = True
-            self.reached_bottom = False
-        self.y += 0.5 * self.direction
+            if self.y < ObstacleSettings.TOP and not self.reached_top:
+                self.direction *= -1
+                self.reached_top = True
+                self.reached_bottom = False
+            self.y += self.speed * self.direction
 
     def intersection_point(self, sensor):
         """
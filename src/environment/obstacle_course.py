@@ -0,0 +1,49 @@
+import numpy as np
+
+from src.common.constants import SimulationSettings, AgentSettings
+from src.environment.spatial_index import UniformGrid
+
+
+class ObstacleCourse:
+    """
+    The obstacles of a map as the simulation sees them, tick after tick.
+    Without trajectories every moving Circle is stepped each tick. With ObstacleTrajectories
+    the Circle objects stay where they are and each tick is a lookup in the table,
+    which also lets the course start at any tick.
+    Maps with at least SimulationSettings.BROADPHASE_THRESHOLD obstacles are indexed by a UniformGrid,
+    whose cells are sized for reach, the size of the agents plus the range of their sensors.
+    """
+
+    def __init__(self, obstacles, trajectories=None, tick=0, reach=AgentSettings.SIZE + AgentSettings.MAX_RANGE):
+        self.obstacles = obstacles
+        self.moving_obstacles = [obstacle for obstacle in obstacles if obstacle.speed]
+        self.trajectories = trajectories
+        self.tick = tick #number of moves since the start of the map
+        self.index = UniformGrid(obstacles, reach) if len(obstacles) >= SimulationSettings.BROADPHASE_THRESHOLD else None
+        if self.index is not None and trajectories is not None:
+            self.index.update(trajectories.position(tick))
+
+    def advance(self):
+        """
+        Moves the obstacles by one tick. Returns the obstacles the way PopulationState.step
+        takes them, the list of Circle or a (centres, radii) pair of arrays.
+        """
+        self.tick += 1
+        if self.trajectories is None:
+            for obstacle in self.moving_obstacles:
+                obstacle.move()
+            if self.index is not None:
+                self.index.update()
+            return self.obstacles
+        centres = self.trajectories.position(self.tick)
+        if self.index is not None:
+            self.index.update(centres)
+        return centres, self.trajectories.radii
+
+    def centres(self):
+        """
+        Current centres of the obstacles as a (nb_obstacles, 2) array.
+        """
+        if self.trajectories is not None:
+            return self.trajectories.position(self.tick)
+        return np.array([(obstacle.x, obstacle.y) for obstacle in self.obstacles], dtype=float).reshape(-1, 2)
@@ -0,0 +1,95 @@
+import random
+import numpy as np
+
+from src.common.constants import AgentSettings
+from src.environment.create_map import create_map, create_random_map
+from src.environment.obstacle_course import ObstacleCourse
+
+
+class Scenario:
+    """
+    One setting an agent is evaluated in: an obstacle course, the phase of its
+    moving obstacles (ticks they have already moved) and the start of the agents.
+    Without a seed the course is the default one of create_map.
+    """
+
+    def __init__(self, seed=None, nb_obstacles=20, phase=0, start=(AgentSettings.START_X, AgentSettings.START_Y)):
+        self.seed = seed
+        self.nb_obstacles = nb_obstacles
+        self.phase = phase
+        self.start = start
+
+    def create_map(self):
+        if self.seed is None:
+            obstacles = create_map()
+        else:
+            obstacles = create_random_map(self.nb_obstacles, seed=self.seed, start=self.start)
+        for obstacle in obstacles:
+            obstacle.move(self.phase)
+        return obstacles
+
+
+def create_scenarios(count, seed=0, nb_obstacles=20, include_default=True):
+    """
+    Returns count seeded scenarios with random courses, phases and starts, the first one
+    being the default course and start when include_default is True.
+    The same seed always gives the same scenarios.
+    """
+    rng = random.Random(seed)
+    scenarios = []
+    for i in range(count):
+        if i == 0 and include_default:
+            scenarios.append(Scenario())
+            continue
+        scenarios.append(Scenario(
+            seed=rng.randrange(2**31),
+            nb_obstacles=nb_obstacles,
+            phase=rng.randrange(1200), #about one period of the oscillation of the obstacles
+            start=(rng.uniform(50, 300), rng.uniform(100, 500))
+        ))
+    return scenarios
+
+
+class ScenarioObstacles:
+    """
+    The obstacle courses of several scenarios run side by side in one PopulationState:
+    agent i of the state lives in scenario i % len(scenarios). It takes the place of the
+    spatial index of PopulationState.step, handing every agent the obstacles of its own
+    scenario, so all the rollouts advance together.
+    reach is the size of the agents plus the range of their sensors, see UniformGrid.
+    """
+
+    def __init__(self, scenarios, reach=AgentSettings.SIZE + AgentSettings.MAX_RANGE):
+        self.courses = [ObstacleCourse(scenario.create_map(), reach=reach) for scenario in scenarios]
+        self.radii = [np.array([obstacle.r for obstacle in course.obstacles], dtype=float).reshape(-1)
+                      for course in self.courses]
+
+    def __len__(self):
+        return len(self.courses)
+
+    def advance(self):
+        for course in self.courses:
+            course.advance()
+
+    def candidates(self, x, y, agents):
+        """
+        Centres and radii of the obstacles each agent has to consider as (N, K, 2)
+        and (N, K) arrays padded with nan, see UniformGrid.candidates.
+        """
+        scenario = np.asarray(agents) % len(self.courses)
+        parts = []
+        for i, course in enumerate(self.courses):
+            selected = np.flatnonzero(scenario == i)
+            if course.index is not None:
+                centres, radii = course.index.candidates(x[selected], y[selected])
+            else:
+                centres = np.broadcast_to(course.centres(), (len(selected), len(self.radii[i]), 2))
+                radii = np.broadcast_to(self.radii[i], (len(selected), len(self.radii[i])))
+            parts.append((selected, centres, radii))
+        width = max(radii.shape[1] for _, _, radii in parts)
+        all_centres = np.full((len(scenario), width, 2), np.nan)
+        all_radii = np.full((len(scenario), width), np.nan)
+        for selected, centres, radii in parts:
+            all_centres[selected, :radii.shape[1]] = centres
+            all_radii[selected, :radii.shape[1]] = radii
+        return all_centres, all_radii
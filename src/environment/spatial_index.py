@@ -0,0 +1,109 @@
+import math as m
+import numpy as np
+
+from src.common.constants import SimulationSettings, AgentSettings
+
+
+class UniformGrid:
+    """
+    Broadphase index over Circle obstacles, so sensors and collisions only look at
+    the obstacles close to an agent instead of the whole map.
+    The map is cut in square cells and every obstacle is registered in all the cells
+    that are within `reach` of it, reach being the furthest an agent can sense or touch
+    (its size plus the range of its sensors). The obstacles an agent has to consider are
+    then exactly the ones registered in the cell holding its centre.
+    Moving obstacles are re-registered incrementally by update(), only when they change cells.
+    """
+
+    def __init__(self, obstacles, reach=AgentSettings.SIZE + AgentSettings.MAX_RANGE,
+                 width=SimulationSettings.WIDTH, height=SimulationSettings.HEIGHT, cell_size=None):
+        self.obstacles = list(obstacles)
+        self.centres = np.array([(obstacle.x, obstacle.y) for obstacle in self.obstacles], dtype=float).reshape(-1, 2)
+        self.radii = np.array([obstacle.r for obstacle in self.obstacles], dtype=float)
+        self.reach = reach
+        self.cell_size = cell_size if cell_size else reach / 2
+        self.columns = max(1, int(m.ceil(width / self.cell_size)))
+        self.rows = max(1, int(m.ceil(height / self.cell_size)))
+        self.cells = [set() for _ in range(self.columns * self.rows)] #indices of the obstacles registered in each cell
+        self._ranges = [None] * len(self.obstacles) #block of cells each obstacle is registered in
+        self._table = None #cells as a padded (nb_cells, max_per_cell) array of obstacle indices, rebuilt when stale
+        self._moving = [i for i, obstacle in enumerate(self.obstacles) if obstacle.speed] #static ones never change cells
+        for i in range(len(self.obstacles)):
+            self._place(i)
+
+    def update(self, centres=None):
+        """
+        Re-registers the obstacles that moved to other cells since the last update.
+        The positions are read from the obstacles, or from centres when the motion
+        comes from a trajectory table.
+        """
+        if centres is None:
+            for i in self._moving:
+                self.centres[i] = self.obstacles[i].x, self.obstacles[i].y
+        else:
+            self.centres = centres
+        for i in self._moving:
+            self._place(i)
+
+    def query(self, x, y):
+        """
+        Returns the obstacles an agent centred on (x, y) can sense or collide with.
+        """
+        return [self.obstacles[i] for i in self.cells[self._cell(x, y)]]
+
+    def candidates(self, x, y, agents=None):
+        """
+        Vectorized query for many agents at once. x and y are arrays of agent positions,
+        returns the centres and radii of the nearby obstacles of every agent as (N, K, 2)
+        and (N, K) arrays, padded with nan for agents with less than K nearby obstacles.
+        agents, the indices of the agents in their population, are only needed when
+        agents don't share the same map, see ScenarioObstacles.
+        """
+        if self._table is None:
+            self._build_table()
+        columns = np.clip((np.asarray(x) // self.cell_size).astype(int), 0, self.columns - 1)
+        rows = np.clip((np.asarray(y) // self.cell_size).astype(int), 0, self.rows - 1)
+        indices = self._table[rows * self.columns + columns]
+        #the index -1 of the padding picks the nan row appended at the end
+        centres = np.concatenate((self.centres, [(np.nan, np.nan)]))
+        radii = np.append(self.radii, np.nan)
+        return centres[indices], radii[indices]
+
+    def _cell(self, x, y):
+        column = min(max(int(x // self.cell_size), 0), self.columns - 1)
+        row = min(max(int(y // self.cell_size), 0), self.rows - 1)
+        return row * self.columns + column
+
+    def _cell_range(self, i):
+        x, y = self.centres[i]
+        extent = self.radii[i] + self.reach
+        first_column = min(max(int((x - extent) // self.cell_size), 0), self.columns - 1)
+        last_column = min(max(int((x + extent) // self.cell_size), 0), self.columns - 1)
+        first_row = min(max(int((y - extent) // self.cell_size), 0), self.rows - 1)
+        last_row = min(max(int((y + extent) // self.cell_size), 0), self.rows - 1)
+        return first_column, last_column, first_row, last_row
+
+    def _cells_of(self, cell_range):
+        first_column, last_column, first_row, last_row = cell_range
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                yield row * self.columns + column
+
+    def _place(self, i):
+        new_range = self._cell_range(i)
+        old_range = self._ranges[i]
+        if new_range == old_range:
+            return
+        if old_range:
+            for cell in self._cells_of(old_range):
+                self.cells[cell].discard(i)
+        for cell in self._cells_of(new_range):
+            self.cells[cell].add(i)
+        self._ranges[i] = new_range
+        self._table = None
+
+    def _build_table(self):
+        width = max([len(cell) for cell in self.cells] + [1])
+        self._table = np.full((len(self.cells), width), -1, dtype=np.intp)
+        for c, cell in enumerate(self.cells):
+            self._table[c, :len(cell)] = sorted(cell)
@@ -0,0 +1,140 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+from src.common.constants import ObstacleSettings
+
+
+class ObstacleTrajectories:
+    """
+    The motion of the obstacles compiled once into a table of positions per tick.
+    Circle.move is deterministic and the same for every agent and every generation,
+    so instead of stepping the obstacles every tick, the table is filled by stepping them
+    once until the motion of each of them repeats, and any tick is then a lookup:
+    position(tick) gives the centres of the obstacles after `tick` moves from the start.
+    The table can be put in shared memory and attached read-only by worker processes,
+    which can then start mid-trajectory without replaying the motion.
+    """
+
+    def __init__(self, table, radii, transient, period, drift, shared=None):
+        self.table = table #(ticks, nb_obstacles, 2) centres, row t is the state after t moves
+        self.radii = radii
+        self.transient = transient #per obstacle, number of ticks before its motion becomes periodic
+        self.period = period #per obstacle
+        self.drift = drift #per obstacle, pixels per tick in y once it has left for good, 0 for periodic ones
+        self._columns = np.arange(len(radii))
+        self._shared = shared #shared memory block backing the table, if any
+
+    @classmethod
+    def compile(cls, obstacles, max_ticks=1000000):
+        """
+        Steps copies of the obstacles, the originals are left untouched, with the same
+        arithmetic as Circle.move until the state of every obstacle repeats.
+        Each obstacle gets its own cycle, the whole map would only repeat after the
+        least common multiple of their periods. The maps of create_map.py only move
+        obstacles inside the [TOP, BOTTOM] band, obstacles of other maps moving from out of
+        it may never come back, those drift away at constant speed.
+        """
+        x = np.array([obstacle.x for obstacle in obstacles], dtype=float)
+        y = np.array([obstacle.y for obstacle in obstacles], dtype=float)
+        speed = np.array([obstacle.speed for obstacle in obstacles], dtype=float)
+        direction = np.array([obstacle.direction for obstacle in obstacles], dtype=float)
+        reached_top = np.array([obstacle.reached_top for obstacle in obstacles], dtype=bool)
+        reached_bottom = np.array([obstacle.reached_bottom for obstacle in obstacles], dtype=bool)
+        radii = np.array([obstacle.r for obstacle in obstacles], dtype=float)
+        transient = np.zeros(len(radii), dtype=int)
+        period = np.zeros(len(radii), dtype=int) #0 until the cycle of the obstacle is found
+        drift = np.zeros(len(radii))
+        seen = [{} for _ in radii] #state of each obstacle -> first tick it was seen
+        positions = []
+        for tick in range(max_ticks):
+            positions.append(np.stack((x, y), axis=-1))
+            escaped = (period == 0) & (
+                (reached_top & (y < ObstacleSettings.TOP) & (direction < 0)) |
+                (reached_bottom & (y > ObstacleSettings.BOTTOM) & (direction > 0))
+            )
+            escaped &= speed > 0
+            transient[escaped] = tick
+            period[escaped] = 1
+            drift[escaped] = speed[escaped] * direction[escaped]
+            for i in np.flatnonzero(period == 0):
+                state = (y[i], direction[i], reached_top[i], reached_bottom[i])
+                if state in seen[i]:
+                    transient[i] = seen[i][state]
+                    period[i] = tick - transient[i]
+                else:
+                    seen[i][state] = tick
+            if period.all():
+                table = np.stack(positions).reshape(len(positions), len(radii), 2)
+                return cls(table, radii, transient, period, drift)
+            _move(y, speed, direction, reached_top, reached_bottom)
+        raise ValueError("the motion of the obstacles doesn't repeat within {} ticks".format(max_ticks))
+
+    def position(self, tick):
+        """
+        Centres of the obstacles after `tick` moves, as a (nb_obstacles, 2) array.
+        """
+        rows = np.where(tick < self.transient, tick, self.transient + (tick - self.transient) % self.period)
+        centres = self.table[rows, self._columns]
+        centres[:, 1] += self.drift * (tick - rows)
+        return centres
+
+    def seek(self, obstacles, tick):
+        """
+        Puts the obstacles the table was compiled from, still in their starting state,
+        in their state after `tick` moves: each one is stepped through its transient and
+        the remainder of its cycle only, obstacles that left for good are then moved by their drift.
+        """
+        rows = np.where(tick < self.transient, tick, self.transient + (tick - self.transient) % self.period)
+        for obstacle, moves, drift in zip(obstacles, rows, self.drift):
+            obstacle.move(int(moves))
+            obstacle.y += drift * (tick - moves)
+
+    def share(self):
+        """
+        Copies the table into shared memory and returns a small picklable handle
+        that worker processes give to attach().
+        """
+        if self._shared is None:
+            self._shared = shared_memory.SharedMemory(create=True, size=max(self.table.nbytes, 1))
+            table = np.ndarray(self.table.shape, dtype=self.table.dtype, buffer=self._shared.buf)
+            table[:] = self.table
+            table.flags.writeable = False
+            self.table = table
+        return dict(name=self._shared.name, shape=self.table.shape, radii=self.radii,
+                    transient=self.transient, period=self.period, drift=self.drift)
+
+    @classmethod
+    def attach(cls, handle):
+        """
+        Maps the table shared by another process, without copying it.
+        """
+        shared = shared_memory.SharedMemory(name=handle["name"])
+        table = np.ndarray(handle["shape"], dtype=float, buffer=shared.buf)
+        table.flags.writeable = False
+        return cls(table, handle["radii"], handle["transient"], handle["period"], handle["drift"], shared)
+
+    def close(self, unlink=False):
+        """
+        Releases the shared memory, the process that shared the table also unlinks it.
+        """
+        if self._shared is not None:
+            self.table = self.table.copy()
+            self._shared.close()
+            if unlink:
+                self._shared.unlink()
+            self._shared = None
+
+
+def _move(y, speed, direction, reached_top, reached_bottom):
+    """
+    Circle.move applied to arrays of obstacles, in place.
+    """
+    bounce = (y > ObstacleSettings.BOTTOM) & ~reached_bottom
+    direction[bounce] *= -1
+    reached_top[bounce] = False
+    reached_bottom[bounce] = True
+    bounce = (y < ObstacleSettings.TOP) & ~reached_top
+    direction[bounce] *= -1
+    reached_top[bounce] = True
+    reached_bottom[bounce] = False
+    y += speed * direction
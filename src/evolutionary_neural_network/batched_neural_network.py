@@ -0,0 +1,46 @@
+import numpy as np #Library for Numerical Data Manipulation
+
+
+class BatchedNeuralNetwork:
+    """
+    The brains of a whole population evaluated together. The weight matrices of
+    every network are stacked into one (population, in, out) tensor per layer,
+    so a forward pass of the whole population is one batched matmul and tanh per layer
+    instead of one small np.dot per layer and per agent.
+    The NeuralNetwork objects stay usable on their own, their genomes become rows of one
+    (population, genome_length) matrix and the stacked tensors are views into that matrix.
+    When the genomes of the networks already are the rows of such a matrix, pass it as genomes
+    and nothing gets copied.
+    Each network can also be run on several inputs at once, see forward.
+    """
+
+    def __init__(self, networks, genomes=None):
+        self.networks = networks
+        if genomes is None:
+            genomes = np.array([network.convert_weights_to_genome() for network in networks])
+        self.genomes = genomes
+        for i, network in enumerate(networks):
+            network.set_genome(genomes[i])
+        offsets = networks[0].offsets
+        self.layers = [genomes[:, offsets[i]:offsets[i + 1]].reshape(len(networks), *shape)
+                       for i, shape in enumerate(networks[0].shapes)]
+
+    def __len__(self):
+        return len(self.networks)
+
+    def __getitem__(self, i):
+        return self.networks[i]
+
+    def forward(self, initial_x, tan_1=True):
+        """
+        Forward propagation of every network, initial_x holds one row of inputs
+        per network and the outputs are returned the same way.
+        initial_x may also hold n rows per network, rows i * n to i * n + n - 1 going
+        to network i, then n rows of outputs per network are returned.
+        """
+        initial_x = np.asarray(initial_x, dtype=float)
+        new_x = initial_x.reshape(len(self.networks), -1, initial_x.shape[-1])
+        for weights in self.layers:
+            new_x = np.matmul(new_x, weights)
+            new_x = np.tanh(new_x) if tan_1 else 1 / (1 + np.exp(-new_x))
+        return new_x.reshape(len(initial_x), -1)
@@ -0,0 +1,121 @@
+import glob
+import json
+import os
+import threading
+import numpy as np #Library for Numerical Data Manipulation
+
+from src.environment.trajectory import ObstacleTrajectories
+
+
+class Checkpointer:
+    """
+    Saves the state of the evolution every `every` generations so a run can be resumed
+    after the process dies: generation number, population genomes, fitness history,
+    state of the random generator and number of simulated ticks. The obstacles aren't saved,
+    their motion is deterministic so restore puts a fresh map back in the state of those ticks.
+    Everything goes in a single uncompressed .npz file. With memmap, the genomes are written
+    to a .npy file next to it instead, which resume maps in memory rather than reading,
+    for very large populations. That file is named after its generation and the .npz
+    names it, so replacing the .npz is the single switch to the new checkpoint and the
+    files of the previous one are only removed after it.
+    The loop only pays for a copy of the genomes, the file is written by a background
+    thread and replaced atomically, so a crash mid-write keeps the previous checkpoint.
+    """
+
+    def __init__(self, path, every=10, memmap=False):
+        self.path = path
+        self.every = every
+        self.memmap = memmap
+        self._writer = None #thread writing the last checkpoint
+
+    def maybe_save(self, evolution, ticks=0):
+        """
+        Saves a checkpoint if one is due for the current generation.
+        """
+        if self.every and evolution.generation % self.every == 0:
+            self.save(evolution, ticks)
+
+    def save(self, evolution, ticks=0):
+        """
+        Snapshots the evolution and writes it in the background.
+        ticks is the number of simulated ticks, the phase of the obstacles.
+        """
+        snapshot = dict(
+            generation=np.array(evolution.generation),
+            genomes=evolution.genomes.copy(),
+            fitness_history=np.array(evolution.fitness_history, dtype=float).reshape(-1, 3),
+            rng_state=np.array(json.dumps(evolution.rng.bit_generator.state)),
+            ticks=np.array(ticks)
+        )
+        self.wait()
+        self._writer = threading.Thread(target=self._write, args=(snapshot,), daemon=True)
+        self._writer.start()
+
+    def wait(self):
+        """
+        Blocks until the last checkpoint is on disk.
+        """
+        if self._writer:
+            self._writer.join()
+            self._writer = None
+
+    def _write(self, snapshot):
+        sidecar = None
+        if self.memmap:
+            genomes = snapshot.pop("genomes")
+            sidecar = genomes_path(self.path, int(snapshot["generation"]))
+            temporary = sidecar + ".tmp"
+            mapped = np.lib.format.open_memmap(temporary, mode="w+", dtype=genomes.dtype, shape=genomes.shape)
+            mapped[:] = genomes
+            mapped.flush()
+            del mapped
+            os.replace(temporary, sidecar)
+            snapshot["genomes_file"] = np.array(os.path.basename(sidecar))
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as file:
+            np.savez(file, **snapshot)
+        os.replace(temporary, self.path) #the checkpoint switches here, with its genomes
+        for stale in glob.glob(glob.escape(self.path) + ".genomes.*.npy"):
+            if stale != sidecar:
+                os.remove(stale)
+
+
+def genomes_path(path, generation):
+    """
+    File of the genomes of the checkpoint of one generation, saved with memmap.
+    """
+    return "{}.genomes.{}.npy".format(path, generation)
+
+
+def load_checkpoint(path):
+    """
+    Reads a checkpoint written by Checkpointer. Genomes saved apart are mapped
+    in copy-on-write mode, so loading doesn't read them.
+    """
+    with np.load(path) as data:
+        checkpoint = {key: data[key] for key in data.files}
+    if "genomes" not in checkpoint:
+        sidecar = os.path.join(os.path.dirname(path), str(checkpoint["genomes_file"]))
+        checkpoint["genomes"] = np.load(sidecar, mmap_mode="c")
+    return checkpoint
+
+
+def restore(evolution, checkpoint, obstacles=()):
+    """
+    Puts the evolution back in the state of the checkpoint, and the obstacles, if given,
+    in their state after the simulated ticks saved with it. They must be a fresh map
+    (create_map()), as the motion is replayed from its start. Returns the number of ticks.
+    """
+    genomes = checkpoint["genomes"]
+    if genomes.shape != evolution.genomes.shape:
+        raise ValueError("checkpoint holds {} genomes, the population expects {}".format(
+            genomes.shape, evolution.genomes.shape))
+    np.copyto(evolution.genomes, genomes) #the brains are views into evolution.genomes
+    evolution.population = evolution.pool.reset(evolution.genomes)
+    evolution.generation = int(checkpoint["generation"])
+    evolution.fitness_history = [tuple(row) for row in checkpoint["fitness_history"]]
+    evolution.rng.bit_generator.state = json.loads(str(checkpoint["rng_state"]))
+    ticks = int(checkpoint["ticks"])
+    if obstacles:
+        ObstacleTrajectories.compile(obstacles).seek(obstacles, ticks)
+    return ticks
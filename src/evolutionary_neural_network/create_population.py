@@ -2,28 +2,37 @@ from src.agent.agent import Agent
 from src.evolutionary_neural_network.neural_network import NeuralNetwork
 from src.common.constants import NeuralNetworkSettings, AgentSettings
 
-def create_population(population_size):
+def create_population(population_size, nb_sensors=None, hidden_layers=None, hidden_units=None, settings=None):
     """
     Creates the starting generation/population of agents.
+    The brains have one input per sensor.
+    settings is the optional Settings of the run, the constants are used without it,
+    and nb_sensors, hidden_layers and hidden_units override either when given.
     """
+    agent_settings = settings.agent if settings else AgentSettings
+    network_settings = settings.neural_network if settings else NeuralNetworkSettings
+    nb_sensors = nb_sensors if nb_sensors is not None else agent_settings.NB_SENSORS
+    hidden_layers = hidden_layers if hidden_layers is not None else network_settings.HIDDEN_LAYERS
+    hidden_units = hidden_units if hidden_units is not None else network_settings.HIDDEN_UNITS
     population = []
     for _ in range(population_size):
         brain = NeuralNetwork(
-            inputs=NeuralNetworkSettings.INPUT_UNITS,
-            hidden_layers=NeuralNetworkSettings.HIDDEN_LAYERS,
-            hidden_units=NeuralNetworkSettings.HIDDEN_UNITS,
-            outputs=NeuralNetworkSettings.OUTPUTS,
+            inputs=nb_sensors,
+            hidden_layers=hidden_layers,
+            hidden_units=hidden_units,
+            outputs=NeuralNetworkSettings.OUTPUTS, #speed and direction, not tunable
             new_weights=False
         )
         starting_agent = Agent(
-            x=AgentSettings.START_X,
-            y=AgentSettings.START_Y,
-            size=AgentSettings.SIZE,
-            field_of_view=AgentSettings.FIELD_OF_VIEW,
-            nb_sensors=AgentSettings.NB_SENSORS,
-            max_range=AgentSettings.MAX_RANGE,
-            brain=brain
+            x=agent_settings.START_X,
+            y=agent_settings.START_Y,
+            size=agent_settings.SIZE,
+            field_of_view=agent_settings.FIELD_OF_VIEW,
+            nb_sensors=nb_sensors,
+            max_range=agent_settings.MAX_RANGE,
+            brain=brain,
+            lifetime=agent_settings.LIFETIME,
+            patience=agent_settings.PATIENCE
         )
         population.append(starting_agent)
     return population
-    
\ No newline at end of file
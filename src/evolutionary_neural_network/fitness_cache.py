@@ -0,0 +1,55 @@
+import hashlib
+from collections import OrderedDict
+
+
+class FitnessCache:
+    """
+    Bounded cache of the evaluation of genomes, keyed by a hash of the genome bytes.
+    Truncation selection and a low mutation rate breed many exact clones of their
+    parents, with a deterministic evaluator (one whose result only depends on the genome,
+    see ScenarioEvaluator) their fitness is already known and they don't need simulating.
+    The least recently used genome is evicted once capacity entries are held.
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.entries = OrderedDict() #key -> (fitness, best distance, hit target), least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(genome):
+        return hashlib.blake2b(genome.tobytes(), digest_size=16).digest()
+
+    def get(self, key):
+        """
+        Returns the evaluation cached under the key, None if there is none.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def hit_rate(self):
+        return self.hits / max(self.hits + self.misses, 1)
+
+    def clear(self):
+        self.entries.clear()
+
+    def summary(self):
+        return "fitness cache: {} genomes, {:.1%} hit rate, {} hits, {} misses, {} evictions".format(
+            len(self), self.hit_rate(), self.hits, self.misses, self.evictions)
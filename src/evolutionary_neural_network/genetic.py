@@ -1,129 +1,144 @@
-import random
-from bisect import bisect_left
-from itertools import accumulate
+import numpy as np #Library for Numerical Data Manipulation
 
-from src.common.constants import AgentSettings, NeuralNetworkSettings
 from src.agent.agent import Agent
+from src.agent.agent_pool import AgentPool
 from src.evolutionary_neural_network.neural_network import NeuralNetwork
+from src.evolutionary_neural_network.selection import TruncationSelection, fittest
 
 
 class Genetic: # Applies the genetic algorithm which will evolve the agents towards a successful solution.
 
 
-    def __init__(self, population, elitism, mutation_rate, population_size):
+    def __init__(self, population, elitism, mutation_rate, population_size, evaluator=None, rng=None, cache=None,
+                 selection=None):
         self.population = population #list of robots
         self.elitism = elitism #a value that decided the number of robots to take starting from the best and going downward.
         self.mutation_rate = mutation_rate #a value that controls the probability of a certain weight of the new born to be changed
         self.population_size = population_size
-
-    def check_if_all_dead(self): #Checks if a generation died.
-
-        if Agent.deaths >= len(self.population):
-            return True
-        return False
-
-
-    def make_next_generation(self):
+        self.evaluator = evaluator #evaluates whole generations at once, see ParallelEvaluator
+        self.cache = cache #FitnessCache of the genomes already evaluated, used with deterministic evaluators
+        self.selection = selection if selection else TruncationSelection(elitism) #how parents are chosen, see selection.py
+        self.rng = rng if rng else np.random.default_rng() #numpy random generator, seed it for reproducible runs
+        #genomes of the population, one row per agent, the brains of the agents are views into it
+        self.genomes = np.array([agent.brain.convert_weights_to_genome() for agent in population])
+        for agent, genome in zip(population, self.genomes):
+            agent.brain.set_genome(genome)
+        self._spare_genomes = np.empty((population_size, self.genomes.shape[1])) #the next generation is bred in here, then the buffers swap
+        self.pool = AgentPool(population, self._create_host_agent) #agents are reused across generations
+        self.generation = 0
+        self.fitness_history = [] #best fitness, mean fitness and share of agents that hit the target, per generation
+        self.elite_genomes = None #copy of the genomes of the elitism fittest agents of the last generation, best last
+
+    def evaluate(self):
         """
-        Creates the next generation, by repeatedly selecting parents,
-        creating a child until n children have been created where
-        n is the population size.
+        Evaluates the fitness of the current population with the evaluator,
+        after which the next generation can be made. Returns the number of ticks it lasted.
+        With a cache and a deterministic evaluator, agents whose genome was evaluated before
+        take the cached fitness, and only the other ones are simulated, once per distinct genome.
         """
-        #cumulative_fitness = self._get_cumulative_fitness()
-        next_generation = []
-        for _ in range(self.population_size):
-            parent_one = self._truncation_selection()
-            parent_two = self._truncation_selection()
-            # parent_one = self._roulette_wheel_selection(cumulative_fitness)
-            # parent_two = self._roulette_wheel_selection(cumulative_fitness)
-            child = self._create_child(parent_one, parent_two)
-            next_generation.append(child)
-        Agent.deaths = 0
-        self.population = next_generation
-
+        if self.cache is None or not getattr(self.evaluator, "deterministic", False):
+            return self.evaluator.evaluate(self.population, self.genomes)
+        keys = [self.cache.key(genome) for genome in self.genomes]
+        pending = {} #key -> agents with that genome, the first one gets simulated
+        for i, (agent, key) in enumerate(zip(self.population, keys)):
+            if key in pending:
+                pending[key].append(i)
+                continue
+            entry = self.cache.get(key)
+            if entry is None:
+                pending[key] = [i]
+            else:
+                agent.fitness, agent.best_distance, agent.hit_target = entry
+                agent.alive = False
+        if not pending:
+            return 0
+        simulated = [indices[0] for indices in pending.values()]
+        agents = [self.population[i] for i in simulated]
+        ticks = self.evaluator.evaluate(agents, self.genomes[simulated])
+        for key, indices in pending.items():
+            agent = self.population[indices[0]]
+            agent.brain.set_genome(self.genomes[indices[0]]) #the evaluator bound the brain to its copy
+            entry = (agent.fitness, agent.best_distance, agent.hit_target)
+            self.cache.put(key, entry)
+            for i in indices[1:]:
+                self.population[i].fitness, self.population[i].best_distance, self.population[i].hit_target = entry
+                self.population[i].alive = False
+        return ticks
 
-    def _truncation_selection(self):
+    def check_if_all_dead(self): #Checks if a generation died.
         """
-        Only the agents among the n fittest will have a change to be chosen
-        where x is the elitism value
+        Reads the alive flag of every agent rather than the Agent.deaths counter,
+        so an agent can't be counted twice.
         """
-        self.population.sort(key=lambda x: x.fitness)
-        fittest = self.population[-self.elitism:]
-        return random.choice(fittest)
-
+        return not any(agent.alive for agent in self.population)
 
-    def _roulette_wheel_selection(self, cumulative_fitness):
-        """
-        It chooses a random number between 0 and 1,
-        inserts it in the list of cumulative_fitness in a way to preserve the order, then it takes the first cumulative_fitness
-        value just right to it and returns it's agent (parent_index).
-        Every agent has the chance to be chosen.
-        Only that the bigger it's fitness value the bigger it's probability to be chosen.
-        ( because the bigger its fitness the bigger the interval between its according accumulative_value and the previous one)
-        """
-        parent_index = bisect_left(
-            cumulative_fitness, random.uniform(0,1))
 
-        return self.population[parent_index]
-    def _get_cumulative_fitness(self):
+    def make_next_generation(self):
         """
-        Returns the cumulative fitness of the population,
-        these are then treated as the probability for selection
-        of each robot in the roulette wheel selection strategy.
+        Creates the next generation at once. The genomes of the population are kept
+        as one (population, genome_length) matrix, every row of the next generation
+        is the uniform crossover of two selected parents followed by mutation,
+        all done with a handful of array operations.
+        The parents of all the children are drawn at once by the selection strategy.
         """
-        self.population.sort(key=lambda x: x.fitness)
-        fitness_values = [p.fitness for p in self.population]
-        relative_fitness_values = [(f / sum(fitness_values)) for f in fitness_values]
-        cumulative_fitness = list(accumulate(relative_fitness_values))
-        return cumulative_fitness
+        fitness = np.array([agent.fitness for agent in self.population])
+        hit_target = np.array([agent.hit_target for agent in self.population])
+        self.fitness_history.append((fitness.max(), fitness.mean(), hit_target.mean()))
+        self.elite_genomes = self.genomes[fittest(fitness, self.elitism)]
+        parents = self.selection.select(fitness, 2 * self.population_size, self.rng)
+        parents_one = parents[:self.population_size]
+        parents_two = parents[self.population_size:]
+        children = self._create_children(parents_one, parents_two, self._spare_genomes)
+        self._mutate(children)
+        self._spare_genomes = self.genomes if self.genomes.shape == children.shape else np.empty_like(children)
+        self.genomes = children
+        Agent.deaths = 0
+        self.population = self.pool.reset(children)
+        self.generation += 1
 
 
-    def _create_host_agent(self, weights):
+    def _create_host_agent(self, genome):
         """
-        Creates a new agent of the same population only with weights
-        passed as an argument which will be the weights taken from the parents.
+        Creates a new agent of the same population only with the genome
+        passed as an argument which will be the genes taken from the parents.
+        The brain uses the genome as it is, without copying it.
+        The settings of the agent and its brain are those of the first agent of the population.
         """
+        template = self.population[0]
         brain = NeuralNetwork(
-            inputs=NeuralNetworkSettings.INPUT_UNITS,
-            hidden_layers=NeuralNetworkSettings.HIDDEN_LAYERS,
-            hidden_units=NeuralNetworkSettings.HIDDEN_UNITS,
-            outputs=NeuralNetworkSettings.OUTPUTS,
-            new_weights=weights
+            inputs=template.brain.inputs,
+            hidden_layers=template.brain.hidden_layers,
+            hidden_units=template.brain.hidden_units,
+            outputs=template.brain.outputs,
+            genome=genome
         )
         agent = Agent(
-            x=AgentSettings.START_X,
-            y=AgentSettings.START_Y,
-            size=AgentSettings.SIZE,
-            field_of_view=AgentSettings.FIELD_OF_VIEW,
-            nb_sensors=AgentSettings.NB_SENSORS,
-            max_range=AgentSettings.MAX_RANGE,
-            brain=brain
+            x=template.start_x,
+            y=template.start_y,
+            size=template.size,
+            field_of_view=template.field_of_view,
+            nb_sensors=len(template.sensors),
+            max_range=template.max_range,
+            brain=brain,
+            lifetime=template.lifetime,
+            patience=template.patience
         )
         return agent
 
 
-    def _create_child(self, first_parent, second_parent):
+    def _create_children(self, parents_one, parents_two, out):
         """
-        Takes two parents and creates a child by applying uniform crossover
-        to their genes.
+        Takes the indices of two parents per child and creates the children, in out, by applying
+        uniform crossover to their genes: a random mask picks every gene from one of the parents.
         """
-        child_genome = []
-        first_parent_genome = first_parent.brain.convert_weights_to_genome()
-        second_parent_genome = second_parent.brain.convert_weights_to_genome()
-        for i in range(len(first_parent_genome)):
-            if random.random() > 0.5: #returns a random number between 0 and 1
-                child_genome.append(first_parent_genome[i])
-            else:
-                child_genome.append(second_parent_genome[i])
-        self._mutate(child_genome)
-        child_weights = first_parent.brain.convert_genome_to_weights(child_genome)
-        return self._create_host_agent(child_weights)
-    def _mutate(self, genome):
+        mask = self.rng.random(out.shape) > 0.5
+        np.take(self.genomes, parents_two, axis=0, out=out)
+        np.copyto(out, self.genomes[parents_one], where=mask)
+        return out
+    def _mutate(self, genomes):
         """
-        Iterates through the genome of a new born with a probability
-        related to the mutation rate to change a gene.
+        Changes every gene of the new born genomes with a probability
+        given by the mutation rate, to a value drawn from a normal distribution.
         """
-        for i in range(len(genome)):
-            if random.random() < self.mutation_rate:
-                genome[i] = random.gauss(0, 1) #normal distribution
-
+        mutations = self.rng.random(genomes.shape) < self.mutation_rate
+        genomes[mutations] = self.rng.standard_normal(np.count_nonzero(mutations))
@@ -0,0 +1,141 @@
+import multiprocessing
+import queue
+import numpy as np #Library for Numerical Data Manipulation
+
+from src.common.constants import EvolutionSettings
+from src.environment.create_map import create_map, create_random_map
+from src.evolutionary_neural_network.create_population import create_population
+from src.evolutionary_neural_network.genetic import Genetic
+from src.simulation.engine import Simulation
+
+
+class Island:
+    """
+    Settings of one island: the seed of its population and random generator,
+    its mutation rate and its map, the default map when map_seed is None
+    and a random map of nb_obstacles obstacles otherwise.
+    """
+
+    def __init__(self, seed, mutation_rate=EvolutionSettings.MUTATION_RATE, map_seed=None, nb_obstacles=200):
+        self.seed = seed
+        self.mutation_rate = mutation_rate
+        self.map_seed = map_seed
+        self.nb_obstacles = nb_obstacles
+
+    def create_map(self):
+        if self.map_seed is None:
+            return create_map()
+        return create_random_map(self.nb_obstacles, seed=self.map_seed)
+
+
+class IslandModel:
+    """
+    Island model evolution. Several independent Genetic populations evolve in separate
+    processes, so the throughput scales with the cores, and every migration_interval
+    generations each island sends copies of its best genomes to the next island of a ring.
+    Migrants go through pipes and are taken without waiting, a fast island never
+    blocks on a slow one, they replace the same number of children of the receiving island.
+    Isolated populations with different seeds, maps or mutation rates keep more diversity
+    than one big population converging on the top ELITISM agents.
+    settings is the optional Settings of the run the agents and their brains are created with,
+    selection the optional strategy every island chooses its parents with, see selection.py.
+    """
+
+    def __init__(self, islands, migration_interval=10, migrants=2, population_size=EvolutionSettings.POPULATION_SIZE,
+                 elitism=EvolutionSettings.ELITISM, settings=None, selection=None):
+        if migration_interval < 1:
+            raise ValueError("migration_interval must be at least 1 generation, got {}".format(migration_interval))
+        if migrants < 0:
+            raise ValueError("migrants must be at least 0, got {}".format(migrants))
+        self.islands = islands
+        self.migration_interval = migration_interval
+        self.migrants = migrants
+        self.population_size = population_size
+        self.elitism = elitism
+        self.settings = settings
+        self.selection = selection
+
+    def run(self, generations, report=print):
+        """
+        Evolves every island for the given number of generations. Progress of each
+        island is passed to report. Returns, per island, its fitness history,
+        the genome of its best agent in the last generation and the architecture
+        (inputs, hidden layers, hidden units, outputs) of the brains.
+        An island whose process dies before it is done is an error, the other ones are stopped.
+        """
+        reports = multiprocessing.Queue()
+        inboxes = [multiprocessing.Queue() for _ in self.islands]
+        processes = []
+        for i, island in enumerate(self.islands):
+            process = multiprocessing.Process(
+                target=_evolve_island,
+                args=(i, island, generations, self, inboxes[i], inboxes[(i + 1) % len(self.islands)], reports),
+                daemon=True
+            )
+            process.start()
+            processes.append(process)
+        results = [None] * len(self.islands)
+        try:
+            while any(result is None for result in results):
+                try:
+                    message = reports.get(timeout=0.5)
+                except queue.Empty:
+                    for j, process in enumerate(processes):
+                        if results[j] is None and process.exitcode is not None:
+                            raise RuntimeError("island {} died with exit code {}".format(j, process.exitcode))
+                    continue
+                if message[0] == "done":
+                    results[message[1]] = message[2]
+                else:
+                    report("island {} generation {} best fitness {:.5f} mean fitness {:.5f} hit target {:.0%}".format(*message[1:]))
+        finally:
+            for process in processes:
+                if any(result is None for result in results):
+                    process.terminate()
+                process.join()
+        return results
+
+
+def _evolve_island(i, island, generations, model, inbox, outbox, reports):
+    """
+    Body of the process of one island.
+    """
+    np.random.seed(island.seed) #initial weights
+    evolution = Genetic(
+        create_population(model.population_size, settings=model.settings),
+        model.elitism,
+        island.mutation_rate,
+        model.population_size,
+        rng=np.random.default_rng(island.seed),
+        selection=model.selection
+    )
+    simulation = Simulation(evolution, island.create_map())
+    while evolution.generation < generations:
+        simulation.run_generation()
+        reports.put(("generation", i, evolution.generation) + tuple(evolution.fitness_history[-1]))
+        if model.migrants > 0 and evolution.generation % model.migration_interval == 0:
+            outbox.put(evolution.elite_genomes[-model.migrants:])
+        _take_migrants(evolution, inbox)
+    brain = evolution.population[0].brain
+    outbox.cancel_join_thread() #the next island may be done already, don't wait on migrants nobody reads
+    reports.put(("done", i, dict(
+        fitness_history=evolution.fitness_history,
+        best_genome=evolution.elite_genomes[-1],
+        architecture=(brain.inputs, brain.hidden_layers, brain.hidden_units, brain.outputs)
+    )))
+
+
+def _take_migrants(evolution, inbox):
+    """
+    Replaces children of the new generation by the migrants waiting in the inbox, if any.
+    The brains are views into the genomes so copying is enough.
+    """
+    start = 0
+    while True:
+        try:
+            migrants = inbox.get_nowait()
+        except queue.Empty:
+            return
+        count = min(len(migrants), len(evolution.genomes) - start)
+        np.copyto(evolution.genomes[start:start + count], migrants[:count])
+        start = (start + count) % len(evolution.genomes)
@@ -3,31 +3,44 @@ import numpy as np #Library for Numerical Data Manipulation
 
 class NeuralNetwork: #Vanilla feedforward architecture.
 
-    def __init__(self, inputs, hidden_layers, hidden_units, outputs, new_weights=False):
+    def __init__(self, inputs, hidden_layers, hidden_units, outputs, new_weights=False, genome=None):
         self.inputs = inputs #number of neurons in the input layer
         self.hidden_layers = hidden_layers #number of hidden layers
         self.hidden_units = hidden_units #number of neuros in a hidden layer with all the hidden layers having the same number.
         self.outputs = outputs #number of units in the output layer
-        if new_weights:
-            self.weights = new_weights #provide weights
+        self.shapes = self._layer_shapes() #shape of the weight matrix between each two consecutive layers
+        self.offsets = np.cumsum([0] + [n * m for n, m in self.shapes]) #where each matrix starts in the genome
+        if genome is not None:
+            self.set_genome(genome) #use the genome as it is, no copy
+        elif new_weights:
+            self.set_genome(np.concatenate([np.ravel(w) for w in new_weights])) #provide weights
         else:
-            self.weights = self._create_weights() #generate random weights
+            self.set_genome(self._create_genome()) #generate random weights
 
-    def _create_weights(self):
+    def _layer_shapes(self):
+        shapes = [(self.inputs, self.hidden_units)]
+        for _ in range(self.hidden_layers - 1):
+            shapes.append((self.hidden_units, self.hidden_units))
+        shapes.append((self.hidden_units, self.outputs))
+        return shapes
+
+    def _create_genome(self):
         """
         Each weights between two consecutive layers can be represented in a matrix, 2-d np array.
-        The function then returns a list of matrices which serve as the starting weights
+        The function then returns a genome holding all the matrices which serve as the starting weights
         for the neural network, these weights are initialised randomly
         from a normal distribution with mean 0.
         """
-        w_first = np.random.randn(self.inputs, self.hidden_units)
-        w_last = np.random.randn(self.hidden_units, self.outputs)
-        weights = [w_first]
-        for _ in range(self.hidden_layers - 1):
-            weights.append(np.random.randn(
-                self.hidden_units, self.hidden_units))
-        weights.append(w_last)
-        return weights
+        return np.random.randn(self.offsets[-1])
+
+    def set_genome(self, genome):
+        """
+        The network owns a single contiguous vector, the genome, and its weights
+        are matrices reshaped as views into it, so setting a genome never copies it
+        and changing the genome changes the weights.
+        """
+        self.genome = genome
+        self.weights = self.convert_genome_to_weights(genome)
 
     def _activation(self, z, tan_1=True): # Activation function : hyperbolic tanget or logit.
 
@@ -47,25 +60,15 @@ class NeuralNetwork: #Vanilla feedforward architecture.
 
     def convert_weights_to_genome(self):
         """
-        Takes the weights of the network as a list of matrices
-        and converts them into a single vector. (a genome)
+        Returns the weights of the network as a single vector (a genome).
+        The weights are views into the genome so there's nothing to convert.
         The goal is to prepare parent agents for crossover.
         """
-        flattened_weights = [w.flatten() for w in self.weights] #return a list of vector
-        genome = np.concatenate(flattened_weights) #return one vector
-        return genome
+        return self.genome
     def convert_genome_to_weights(self, genome):
         """
         Takes a vector, the genome, and reshapes it into the a list of
-        matrices.
+        matrices which are views into the genome.
         """
-        shapes = [np.shape(w) for w in self.weights] #shape is a tuple that contains the length of the columns and rows (N,M)
-        products = [i[0]*i[1] for i in shapes] #retruns the number of elements in the matric, which is NxM
-        weights = []
-        start_idx = 0
-        for i in range(len(products)):
-            stop_idx = sum(products[:i+1]) #the position of the last weight of a matrix
-            weight = np.reshape(genome[start_idx:stop_idx], shapes[i])
-            weights.append(weight)
-            start_idx += products[i] #the position of the first weight of a matrix
-        return weights
+        return [genome[self.offsets[i]:self.offsets[i + 1]].reshape(shape)
+                for i, shape in enumerate(self.shapes)]
@@ -0,0 +1,93 @@
+import multiprocessing
+import numpy as np #Library for Numerical Data Manipulation
+
+from src.agent.population_state import PopulationState
+from src.environment.create_map import create_map
+from src.environment.trajectory import ObstacleTrajectories
+from src.evolutionary_neural_network.neural_network import NeuralNetwork
+from src.simulation.engine import simulate_lifetime
+
+_attached = {} #trajectory tables a worker has attached, by shared memory name
+
+
+class ParallelEvaluator:
+    """
+    Evaluates the fitness of a whole generation on a pool of worker processes.
+    Agents don't interact with each other and the obstacles follow a deterministic path,
+    so the genomes of the population are split in shards and every worker simulates its
+    shard for the full lifetime on its own copy of the map. The obstacles of each copy
+    start where the previous generation left them, like in the single process simulation.
+    Workers rebuild agents and brains with the settings of the agents of the population.
+    The motion of the obstacles is compiled into ObstacleTrajectories, unless they are given,
+    and the table is put in shared memory once. Every worker reads the obstacles from it
+    at the tick it starts from, instead of replaying their whole motion up to that tick.
+    The phase of the obstacles changes from one generation to the next, so the fitness of a genome does too.
+    """
+
+    deterministic = False
+
+    def __init__(self, workers=None, map_factory=create_map, trajectories=None):
+        self.workers = workers if workers else multiprocessing.cpu_count()
+        self.map_factory = map_factory #picklable function building the obstacle course
+        self.ticks = 0 #ticks simulated since the start, gives the phase of the obstacles
+        self.trajectories = trajectories if trajectories is not None else ObstacleTrajectories.compile(map_factory())
+        self.handle = self.trajectories.share()
+        self.pool = multiprocessing.Pool(self.workers)
+
+    def evaluate(self, population, genomes=None):
+        """
+        Simulates the population and writes the fitness, best distance and
+        target hits back on the agents. genomes is the matrix the genomes of the brains
+        are rows of, if any. Returns the number of ticks the generation lasted.
+        """
+        if genomes is None:
+            genomes = np.array([agent.brain.convert_weights_to_genome() for agent in population])
+        template = _template(population[0])
+        shards = [(shard, template, self.map_factory, self.ticks, self.handle)
+                  for shard in np.array_split(genomes, self.workers) if len(shard)]
+        results = self.pool.map(_evaluate_shard, shards)
+        fitness = np.concatenate([result[0] for result in results])
+        best_distance = np.concatenate([result[1] for result in results])
+        hit_target = np.concatenate([result[2] for result in results])
+        for i, agent in enumerate(population):
+            agent.fitness = float(fitness[i])
+            agent.best_distance = float(best_distance[i])
+            agent.hit_target = bool(hit_target[i])
+            agent.alive = False
+        ticks = max(result[3] for result in results)
+        self.ticks += ticks
+        return ticks
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        self.trajectories.close(unlink=True)
+
+
+def _evaluate_shard(shard):
+    """
+    Worker side of ParallelEvaluator, simulates the genomes of one shard for a full lifetime.
+    """
+    genomes, template, map_factory, start_tick, handle = shard
+    obstacles = map_factory()
+    if handle["name"] not in _attached:
+        _attached[handle["name"]] = ObstacleTrajectories.attach(handle)
+    trajectories = _attached[handle["name"]]
+    architecture, settings, sensor_angles = template
+    brains = [NeuralNetwork(*architecture, genome=genome) for genome in genomes]
+    state = PopulationState(len(genomes), **settings)
+    state.sensor_angles = sensor_angles
+    state, ticks = simulate_lifetime(brains, obstacles, genomes, state, trajectories, start_tick)
+    return state.fitness, state.best_distance, state.hit_target, ticks
+
+
+def _template(agent):
+    """
+    What a worker needs to rebuild agents like this one: the architecture of its brain,
+    the settings of its PopulationState and the angles of its sensors.
+    """
+    brain = agent.brain
+    settings = dict(x=agent.start_x, y=agent.start_y, size=agent.size, nb_sensors=len(agent.sensors),
+                    max_range=agent.max_range, lifetime=agent.lifetime, patience=agent.patience)
+    sensor_angles = np.array([sensor.angle for sensor in agent.sensors], dtype=float)
+    return (brain.inputs, brain.hidden_layers, brain.hidden_units, brain.outputs), settings, sensor_angles
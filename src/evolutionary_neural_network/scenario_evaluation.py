@@ -0,0 +1,81 @@
+import numpy as np #Library for Numerical Data Manipulation
+
+from src.agent.population_state import PopulationState
+from src.environment.scenarios import ScenarioObstacles
+from src.evolutionary_neural_network.batched_neural_network import BatchedNeuralNetwork
+
+AGGREGATES = {
+    "mean": np.mean,
+    "min": np.min #fitness of the worst scenario, for robust agents
+}
+
+
+class ScenarioEvaluator:
+    """
+    Evaluates every genome on several scenarios (courses, phases of the obstacles and
+    starts, see create_scenarios) instead of the single default map, so brains don't
+    overfit one course. The population x scenarios rollouts are advanced together in
+    one PopulationState, agent i of the state running genome i // len(scenarios) in
+    scenario i % len(scenarios), and their brains in one BatchedNeuralNetwork forward pass.
+    The fitness of a genome is the aggregate (mean or min) of its fitness in every scenario,
+    its best distance the mean of its best distances, and it hit the target only if it hit
+    the target in every scenario.
+    Every generation is evaluated on the same scenarios, from the same phase, so the
+    evaluation of a genome never changes and can be cached, see FitnessCache.
+    """
+
+    deterministic = True
+
+    def __init__(self, scenarios, aggregate="mean"):
+        self.scenarios = scenarios
+        self.aggregate = AGGREGATES[aggregate] if isinstance(aggregate, str) else aggregate
+        self.ticks = 0 #ticks simulated since the start
+        self.state = None #rollouts of the largest population so far, smaller ones run a prefix of it
+
+    def evaluate(self, population, genomes=None):
+        """
+        Simulates the population in every scenario and writes the aggregated fitness,
+        best distance and target hits back on the agents. genomes is the matrix the genomes
+        of the brains are rows of, if any. Returns the number of ticks the evaluation lasted.
+        """
+        count = len(self.scenarios)
+        state = self._state(population)
+        obstacles = ScenarioObstacles(self.scenarios, state.size + state.max_range)
+        brains = BatchedNeuralNetwork([agent.brain for agent in population], genomes)
+        ticks = 0
+        while not state.all_dead():
+            obstacles.advance()
+            state.step(brains.forward(state.sensor_inputs()), None, obstacles)
+            ticks += 1
+        fitness = self.aggregate(state.fitness.reshape(-1, count), axis=1)
+        best_distance = state.best_distance.reshape(-1, count).mean(axis=1)
+        hit_target = state.hit_target.reshape(-1, count).all(axis=1)
+        for i, agent in enumerate(population):
+            agent.fitness = float(fitness[i])
+            agent.best_distance = float(best_distance[i])
+            agent.hit_target = bool(hit_target[i])
+            agent.alive = False
+        self.ticks += ticks
+        return ticks
+
+    def close(self):
+        pass
+
+    def _state(self, population):
+        """
+        One row per rollout, with the settings of the agents and the start of each scenario.
+        With a FitnessCache the number of genomes simulated changes every generation,
+        the state is only allocated again when it grows and the rollouts run in its first rows.
+        """
+        size = len(population) * len(self.scenarios)
+        if self.state is None or self.state.population_size < size:
+            agent = population[0]
+            starts = np.array([scenario.start for scenario in self.scenarios], dtype=float)
+            self.state = PopulationState(size, x=np.tile(starts[:, 0], len(population)),
+                                         y=np.tile(starts[:, 1], len(population)), size=agent.size,
+                                         nb_sensors=len(agent.sensors), max_range=agent.max_range,
+                                         lifetime=agent.lifetime, patience=agent.patience)
+            self.state.sensor_angles = np.array([sensor.angle for sensor in agent.sensors], dtype=float)
+        state = self.state if self.state.population_size == size else self.state.prefix(size)
+        state.reset()
+        return state
@@ -0,0 +1,105 @@
+import numpy as np #Library for Numerical Data Manipulation
+
+
+def fittest(fitness, count):
+    """
+    Indices of the count fittest agents, least fit first, ties in index order.
+    Only those are sorted, the rest of the population is partitioned away in linear time.
+    """
+    count = min(count, len(fitness))
+    if count <= 0:
+        return np.empty(0, dtype=int)
+    top = np.argpartition(fitness, len(fitness) - count)[len(fitness) - count:]
+    return top[np.lexsort((top, fitness[top]))]
+
+
+def _cumulative_probabilities(weights):
+    """
+    Cumulative selection probabilities proportional to the weights,
+    uniform when the weights are all zero.
+    """
+    total = weights.sum()
+    if total <= 0:
+        weights = np.ones(len(weights))
+        total = len(weights)
+    return np.cumsum(weights / total)
+
+
+def _sample(cumulative, points):
+    """
+    Indices of the agents whose slice of the cumulative probabilities holds each point.
+    """
+    return np.minimum(np.searchsorted(cumulative, points, side='left'), len(cumulative) - 1)
+
+
+class TruncationSelection:
+    """
+    Only the `elitism` fittest agents can be chosen, all with the same chance.
+    """
+
+    def __init__(self, elitism):
+        self.elitism = elitism
+
+    def select(self, fitness, count, rng):
+        parents = fittest(fitness, self.elitism)
+        return parents[rng.integers(len(parents), size=count)]
+
+
+class RouletteSelection:
+    """
+    Every agent can be chosen, with a chance proportional to its fitness:
+    a random number between 0 and 1 falls in the slice of the cumulative fitness of one agent,
+    and the fitter the agent the bigger its slice.
+    """
+
+    def select(self, fitness, count, rng):
+        return _sample(_cumulative_probabilities(fitness), rng.uniform(0, 1, size=count))
+
+
+class RankSelection:
+    """
+    Like the roulette but the chance of an agent is proportional to its rank in the
+    population, 1 for the least fit up to the population size for the fittest, so a few
+    agents much fitter than the rest don't take over the next generation.
+    """
+
+    def select(self, fitness, count, rng):
+        ranks = np.empty(len(fitness))
+        ranks[np.argsort(fitness, kind='stable')] = np.arange(1, len(fitness) + 1)
+        return _sample(_cumulative_probabilities(ranks), rng.uniform(0, 1, size=count))
+
+
+class TournamentSelection:
+    """
+    Each parent is the fittest of `size` agents picked at random.
+    The bigger the tournaments, the stronger the pressure towards the fittest.
+    """
+
+    def __init__(self, size=3):
+        self.size = size
+
+    def select(self, fitness, count, rng):
+        contestants = rng.integers(len(fitness), size=(count, self.size))
+        winners = np.argmax(fitness[contestants], axis=1)
+        return contestants[np.arange(count), winners]
+
+
+class StochasticUniversalSampling:
+    """
+    Roulette with count evenly spaced pointers and a single random offset, so every
+    agent is chosen about as many times as its share of the fitness allows, without the
+    luck of the draw of the roulette. The parents are shuffled so they don't pair up by fitness.
+    """
+
+    def select(self, fitness, count, rng):
+        points = (rng.uniform(0, 1) + np.arange(count)) / count
+        return rng.permutation(_sample(_cumulative_probabilities(fitness), points))
+
+
+SELECTIONS = {
+    "truncation": TruncationSelection,
+    "roulette": RouletteSelection,
+    "rank": RankSelection,
+    "tournament": TournamentSelection,
+    "sus": StochasticUniversalSampling
+}
@@ -0,0 +1,305 @@
+import argparse
+import concurrent.futures
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import queue
+import random
+import time
+import numpy as np #Library for Numerical Data Manipulation
+
+from src.common.settings import Settings
+from src.environment.create_map import create_map
+from src.evolutionary_neural_network.checkpoint import Checkpointer, load_checkpoint, restore
+from src.evolutionary_neural_network.create_population import create_population
+from src.evolutionary_neural_network.genetic import Genetic
+from src.simulation.engine import Simulation
+
+_reports = None #queue the runs of a worker process report to, see _init_worker
+
+
+class Sweep:
+    """
+    Hyperparameter sweep: headless, seeded runs of every configuration of a search space,
+    scheduled on a pool of worker processes. The space is a dict read from json:
+
+        {"grid": {"evolution.MUTATION_RATE": [0.005, 0.02], "neural_network.HIDDEN_UNITS": [8, 16]},
+         "seeds": [0, 1], "generations": 50, "seconds": 600, "base": {"agent": {"PATIENCE": 60}}}
+
+    "grid" runs every combination of the values, "random" instead draws "samples"
+    configurations (seeded by "sample_seed"), a setting being a list of values to pick from
+    or one of {"uniform": [low, high]}, {"log_uniform": [low, high]}, {"int": [low, high]}.
+    Every configuration runs once per seed, on top of the "base" settings, until it has
+    evolved "generations" generations or run for "seconds" seconds, whichever comes first.
+    The best and mean fitness and the share of agents that hit the target of every generation
+    are appended to the results file, one json record per line, as the runs go.
+    Every run checkpoints itself every checkpoint_every generations, so running the same
+    space with the same results file again skips the finished runs and resumes the other ones.
+    A worker process dying (killed, out of memory) stops the sweep with an error, to be resumed.
+    """
+
+    def __init__(self, space, results, workers=None, checkpoint_every=10):
+        self.space = space
+        self.results = results #path of the .jsonl results file
+        self.workers = workers if workers else multiprocessing.cpu_count()
+        self.checkpoint_every = checkpoint_every
+        self.runs = expand(space)
+
+    @classmethod
+    def load(cls, path, results, workers=None, checkpoint_every=10):
+        with open(path) as file:
+            return cls(json.load(file), results, workers, checkpoint_every)
+
+    def checkpoint_path(self, run):
+        return "{}.runs/{}.npz".format(self.results, run["run"])
+
+    def run(self, report=print):
+        """
+        Runs every run of the space that isn't finished in the results file.
+        Progress of each run is passed to report. Returns the summary of the results.
+        """
+        records = self._open()
+        finished = {record["run"] for record in records if "done" in record}
+        elapsed = {} #run -> generation -> seconds it had run for, to resume the time budget
+        for record in records:
+            if "generation" in record and "best" in record:
+                elapsed.setdefault(record["run"], {})[record["generation"]] = record["seconds"]
+        tasks = [(run, self.space.get("base", {}), self.space.get("generations"), self.space.get("seconds"),
+                  self.checkpoint_path(run), self.checkpoint_every, elapsed.get(run["run"], {}))
+                 for run in self.runs if run["run"] not in finished]
+        if tasks:
+            os.makedirs(self.results + ".runs", exist_ok=True)
+            self._schedule(tasks, report)
+            if not os.listdir(self.results + ".runs"): #every run finished, their checkpoints are gone
+                os.rmdir(self.results + ".runs")
+        return summarize(read_results(self.results))
+
+    def _open(self):
+        """
+        Reads the records of the results file, creating it for this space if it doesn't exist.
+        A results file of another space is an error, a partial trailing line
+        (the process died while writing it) is cut off.
+        """
+        if not os.path.exists(self.results):
+            with open(self.results, "w") as file:
+                file.write(json.dumps({"sweep": self.space}) + "\n")
+            return []
+        with open(self.results, "rb+") as file:
+            data = file.read()
+            file.truncate(data.rfind(b"\n") + 1)
+        records = read_results(self.results)
+        if not records or records[0].get("sweep") != self.space:
+            raise ValueError("{} holds the results of another sweep".format(self.results))
+        return records[1:]
+
+    def _schedule(self, tasks, report):
+        """
+        Runs the tasks on a process pool, writing the records they report as they come.
+        Unlike multiprocessing.Pool, whose results never come when a worker vanishes,
+        the futures of a ProcessPoolExecutor fail with BrokenProcessPool, so a dead worker
+        ends the sweep with a RuntimeError once the records already reported are written.
+        """
+        reports = multiprocessing.Queue()
+        with concurrent.futures.ProcessPoolExecutor(min(self.workers, len(tasks)), initializer=_init_worker,
+                                                    initargs=(reports,)) as pool:
+            futures = [pool.submit(_sweep_run, task) for task in tasks]
+            with open(self.results, "a") as results:
+                while True:
+                    try:
+                        record = reports.get(timeout=0.1)
+                    except queue.Empty:
+                        if all(future.done() for future in futures):
+                            break
+                        continue
+                    results.write(json.dumps(record) + "\n")
+                    results.flush() #a record is on disk once written, for resume and for anyone tailing the file
+                    report(_describe(record))
+            try:
+                for future in futures:
+                    future.result() #raises what failed outside of a run
+            except concurrent.futures.process.BrokenProcessPool:
+                raise RuntimeError("a worker process of the sweep died, run the sweep again to resume it")
+
+
+def expand(space):
+    """
+    The runs of a search space, in a fixed order so a resumed sweep finds the same runs:
+    one dict per configuration and seed, with its index, seed and `section.NAME` settings.
+    """
+    if "grid" in space:
+        names = list(space["grid"])
+        configurations = [dict(zip(names, values)) for values in itertools.product(*space["grid"].values())]
+    elif "random" in space:
+        rng = random.Random(space.get("sample_seed", 0))
+        configurations = [{name: _sample(distribution, rng) for name, distribution in space["random"].items()}
+                          for _ in range(space.get("samples", 10))]
+    else:
+        raise ValueError("a search space needs a 'grid' or a 'random' section")
+    if not space.get("generations") and not space.get("seconds"):
+        raise ValueError("a search space needs a budget, 'generations' and/or 'seconds' per run")
+    runs = []
+    for configuration in configurations:
+        Settings(space.get("base", {})).update(nest(configuration)) #unknown settings fail here, not in a worker
+        for seed in space.get("seeds", [0]):
+            runs.append(dict(run=len(runs), seed=seed, settings=configuration))
+    return runs
+
+
+def nest(settings):
+    """
+    Turns {"section.NAME": value} into the {section: {NAME: value}} of Settings.update.
+    """
+    nested = {}
+    for key, value in settings.items():
+        section, dot, name = key.partition(".")
+        if not dot:
+            raise ValueError("expected section.NAME, got {!r}".format(key))
+        nested.setdefault(section, {})[name] = value
+    return nested
+
+
+def _sample(distribution, rng):
+    if isinstance(distribution, list):
+        return rng.choice(distribution)
+    (kind, (low, high)), = distribution.items()
+    if kind == "uniform":
+        return rng.uniform(low, high)
+    if kind == "log_uniform":
+        return math.exp(rng.uniform(math.log(low), math.log(high)))
+    if kind == "int":
+        return rng.randint(low, high)
+    raise ValueError("unknown distribution {!r}, expected uniform, log_uniform or int".format(kind))
+
+
+def read_results(path):
+    """
+    The records of a results file, skipping a partial trailing line.
+    """
+    records = []
+    with open(path) as file:
+        for line in file:
+            if line.endswith("\n"):
+                records.append(json.loads(line))
+    return records
+
+
+def summarize(records):
+    """
+    Aggregates the runs of the results by configuration, fittest first: number of finished
+    runs and, over their seeds, the mean best fitness of their last generation, the mean
+    share of agents hitting the target in their last generation and the mean generations.
+    A resumed run may have reported a generation twice, the last report counts.
+    """
+    last = {} #run -> last generation record
+    runs = {}
+    for record in records:
+        if "best" in record:
+            if record["run"] not in last or record["generation"] >= last[record["run"]]["generation"]:
+                last[record["run"]] = record
+        elif "done" in record:
+            runs[record["run"]] = record
+    configurations = {}
+    for run, done in runs.items():
+        if run in last:
+            configurations.setdefault(json.dumps(last[run]["settings"], sort_keys=True), []).append(last[run])
+    summary = [dict(
+        settings=json.loads(key),
+        runs=len(finals),
+        best=float(np.mean([final["best"] for final in finals])),
+        hit_target=float(np.mean([final["hit_target"] for final in finals])),
+        generations=float(np.mean([final["generation"] for final in finals]))
+    ) for key, finals in configurations.items()]
+    return sorted(summary, key=lambda row: -row["best"])
+
+
+def _describe(record):
+    if "error" in record:
+        return "run {} failed: {}".format(record["run"], record["error"])
+    if "done" in record:
+        return "run {} done after {} generations ({})".format(record["run"], record["generation"], record["done"])
+    return "run {} generation {} best fitness {:.5f} mean fitness {:.5f} hit target {:.0%}".format(
+        record["run"], record["generation"], record["best"], record["mean"], record["hit_target"])
+
+
+def _init_worker(reports):
+    global _reports
+    _reports = reports
+
+
+def _sweep_run(task):
+    """
+    Body of one run in a worker process. Errors are reported as a record, the run
+    stays unfinished and is retried when the sweep is resumed.
+    """
+    run = task[0]
+    try:
+        _evolve(*task)
+    except Exception as error:
+        _reports.put(dict(run=run["run"], error="{}: {}".format(type(error).__name__, error)))
+
+
+def _evolve(run, base, generations, seconds, checkpoint, checkpoint_every, elapsed):
+    settings = Settings(base)
+    settings.update(nest(run["settings"]))
+    np.random.seed(run["seed"]) #initial weights
+    evolution = Genetic(
+        create_population(settings.evolution.POPULATION_SIZE, settings=settings),
+        settings.evolution.ELITISM,
+        settings.evolution.MUTATION_RATE,
+        settings.evolution.POPULATION_SIZE,
+        rng=np.random.default_rng(run["seed"])
+    )
+    obstacles = create_map()
+    ticks = 0
+    if os.path.exists(checkpoint):
+        ticks = restore(evolution, load_checkpoint(checkpoint), obstacles)
+    offset = elapsed.get(evolution.generation, 0.0) #seconds already spent up to the checkpoint
+    simulation = Simulation(evolution, obstacles, tick=ticks)
+    checkpointer = Checkpointer(checkpoint, checkpoint_every)
+    start = time.perf_counter()
+    done = None
+    while done is None:
+        if generations and evolution.generation >= generations:
+            done = "generations"
+        elif seconds and offset + time.perf_counter() - start >= seconds:
+            done = "seconds"
+        else:
+            simulation.run_generation()
+            best, mean, hit_target = evolution.fitness_history[-1]
+            _reports.put(dict(run=run["run"], seed=run["seed"], settings=run["settings"],
+                              generation=evolution.generation, best=float(best), mean=float(mean),
+                              hit_target=float(hit_target), seconds=offset + time.perf_counter() - start))
+            checkpointer.maybe_save(evolution, simulation.tick)
+    checkpointer.wait()
+    _reports.put(dict(run=run["run"], done=done, generation=evolution.generation,
+                      seconds=offset + time.perf_counter() - start))
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a hyperparameter sweep, see Sweep for the search space.")
+    parser.add_argument("space", nargs="?", help="json file of the search space")
+    parser.add_argument("--results", default="sweep.jsonl", help="results file, resumed if it exists")
+    parser.add_argument("--workers", type=int, help="runs at once, one per core by default")
+    parser.add_argument("--checkpoint-every", type=int, default=10, metavar="GENERATIONS")
+    parser.add_argument("--summary", action="store_true", help="only print the summary of the results file")
+    args = parser.parse_args()
+    if not args.summary and not args.space:
+        parser.error("the search space is required to run a sweep")
+    try:
+        if args.summary:
+            summary = summarize(read_results(args.results))
+        else:
+            summary = Sweep.load(args.space, args.results, args.workers, args.checkpoint_every).run()
+    except (OSError, ValueError, RuntimeError) as error:
+        parser.error(str(error))
+    for row in summary:
+        print("best fitness {:.5f} hit target {:.0%} generations {:.0f} runs {} {}".format(
+            row["best"], row["hit_target"], row["generations"], row["runs"], json.dumps(row["settings"])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import time
+
+from src.common.constants import SimulationSettings
+
+
+class SimulationClock:
+    """
+    Fixed timestep clock of the simulation. Time is counted in ticks, every tick
+    moves the world by the same amount no matter how long it took to compute,
+    so results don't depend on the speed or the load of the machine.
+    When fast_forward is off the clock waits to run at `fps` ticks per second,
+    which is what we want when watching, otherwise it runs as fast as the CPU allows.
+    """
+
+    def __init__(self, fps=SimulationSettings.FPS, fast_forward=False):
+        self.fps = fps
+        self.fast_forward = fast_forward
+        self.ticks = 0 #ticks since the clock was created
+        self._next_tick_time = None #wall clock deadline of the next tick in real time mode
+
+    def tick(self):
+        """
+        Advances the clock by one tick, sleeping if needed in real time mode.
+        """
+        self.ticks += 1
+        if self.fast_forward:
+            return
+        now = time.perf_counter()
+        if self._next_tick_time is None or now - self._next_tick_time > 1:
+            self._next_tick_time = now #first tick or far behind, don't try to catch up
+        delay = self._next_tick_time - now
+        if delay > 0:
+            time.sleep(delay)
+        self._next_tick_time += 1 / self.fps
+
+    def toggle_fast_forward(self):
+        self.fast_forward = not self.fast_forward
+        self._next_tick_time = None
+
+    def seconds(self):
+        """
+        Simulated time in seconds.
+        """
+        return self.ticks / self.fps
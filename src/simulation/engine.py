@@ -0,0 +1,106 @@
+from src.agent.population_state import PopulationState
+from src.environment.obstacle_course import ObstacleCourse
+from src.simulation.clock import SimulationClock
+from src.common.profiling import profiler
+from src.evolutionary_neural_network.batched_neural_network import BatchedNeuralNetwork
+
+
+class Simulation:
+    """
+    Headless simulation of the world. One step moves the obstacles, the sensors,
+    runs the brains, checks for collisions and evaluates the fitness of every agent.
+    Nothing in here imports pygame, drawing is left to the renderer which only
+    reads the state after each step.
+    Time is measured in ticks of a fixed timestep clock, see SimulationClock.
+    The agents are advanced all at once through a PopulationState, the Agent objects
+    of the population only receive their final state when the generation ends.
+    Likewise their brains are run together through a BatchedNeuralNetwork.
+    The obstacles are run by an ObstacleCourse: maps with many obstacles go through a
+    UniformGrid broadphase so the cost of sensing doesn't grow with the size of the map,
+    and with precompiled ObstacleTrajectories moving the obstacles is a table lookup.
+    """
+
+    def __init__(self, evolution, obstacles, clock=None, trajectories=None, tick=0):
+        self.evolution = evolution #the genetic algorithm holding the current population
+        self.obstacles = obstacles
+        self.clock = clock if clock else SimulationClock(fast_forward=True)
+        self.state = PopulationState.from_agents(evolution.population)
+        self.course = ObstacleCourse(obstacles, trajectories, tick, self.state.size + self.state.max_range)
+        self.brains = self._stack_brains()
+        self.stream = None #StateStream the state is published to after every tick, if any
+        self.recorder = None #Recorder writing the state of every tick to a file, if any
+
+    @property
+    def population(self):
+        return self.evolution.population
+
+    @property
+    def generation(self):
+        return self.evolution.generation
+
+    @property
+    def tick(self):
+        return self.course.tick
+
+    def obstacle_centres(self):
+        return self.course.centres()
+
+    def step(self):
+        """
+        Advances the world by one tick. Returns True when the tick ended
+        the generation and a new population has been bred.
+        """
+        self.clock.tick()
+        with profiler.phase("obstacles"):
+            obstacles = self.course.advance()
+        if profiler.enabled:
+            profiler.count("agents_alive", int(self.state.alive.sum()))
+        with profiler.phase("brains"):
+            brain_outputs = self.brains.forward(self.state.sensor_inputs())
+        self.state.step(brain_outputs, obstacles, self.course.index)
+        if self.stream is not None:
+            with profiler.phase("streaming"):
+                self.stream.publish(self)
+        if self.recorder is not None:
+            with profiler.phase("recording"):
+                self.recorder.record(self)
+        profiler.tick()
+        if self.state.all_dead():
+            with profiler.phase("breeding"):
+                self.state.write_back(self.evolution.population)
+                self.evolution.make_next_generation()
+                self.state.reset()
+                self.brains = self._stack_brains()
+            return True
+        return False
+
+    def run_generation(self):
+        """
+        Steps the world until the current generation is over.
+        """
+        while not self.step():
+            pass
+
+    def _stack_brains(self):
+        return BatchedNeuralNetwork([agent.brain for agent in self.evolution.population], self.evolution.genomes)
+
+
+def simulate_lifetime(brains, obstacles, genomes=None, state=None, trajectories=None, start_tick=0):
+    """
+    Runs a population of brains on a map until all the agents are dead,
+    as fast as possible and with no clock nor rendering.
+    genomes is the optional matrix the genomes of the brains are rows of, see BatchedNeuralNetwork.
+    state is the optional PopulationState to run, by default one with the agent settings.
+    With trajectories the obstacles start at start_tick of the table.
+    Returns the final PopulationState and the number of ticks it lasted.
+    """
+    if state is None:
+        state = PopulationState(len(brains))
+    course = ObstacleCourse(obstacles, trajectories, start_tick, state.size + state.max_range)
+    batched_brains = BatchedNeuralNetwork(brains, genomes)
+    ticks = 0
+    while not state.all_dead():
+        obstacles = course.advance()
+        state.step(batched_brains.forward(state.sensor_inputs()), obstacles, course.index)
+        ticks += 1
+    return state, ticks
@@ -0,0 +1,202 @@
+import os
+import numpy as np
+
+MAGIC = b"CAREC001" #first bytes of a recording, with the version of the format
+
+
+def _layout(population_size, nb_obstacles, nb_sensors):
+    """
+    Little endian, unpadded dtypes of the static part of a recording and of one frame.
+    Positions, headings and sensor readings are stored as float32, plenty for drawing.
+    """
+    static = np.dtype([
+        ('centres', '<f8', (nb_obstacles, 2)), #starting position of the obstacles
+        ('radii', '<f8', (nb_obstacles,)),
+        ('colours', '<f8', (nb_obstacles, 3)),
+        ('moving', '?', (nb_obstacles,)),
+        ('sensor_angles', '<f8', (nb_sensors,)),
+        ('size', '<f8'),
+        ('max_range', '<f8')
+    ])
+    frame = np.dtype([
+        ('generation', '<i4'),
+        ('tick', '<i4'),
+        ('x', '<f4', (population_size,)),
+        ('y', '<f4', (population_size,)),
+        ('angle', '<f4', (population_size,)),
+        ('sensor_distances', '<f4', (population_size, nb_sensors)),
+        ('obstacles', '<f4', (nb_obstacles, 2)),
+        ('alive', '?', (population_size,))
+    ])
+    return static, frame
+
+
+def _header(population_size, nb_obstacles, nb_sensors):
+    """
+    Header dtype: magic, sizes of the population, the map and the sensors, then the static part.
+    """
+    static, _ = _layout(population_size, nb_obstacles, nb_sensors)
+    return np.dtype([('magic', 'S8'), ('sizes', '<i8', (3,)), ('static', static)])
+
+
+def _index_path(path):
+    return path + ".index"
+
+
+class Recorder:
+    """
+    Records the per-tick state of the agents and obstacles of a Simulation, every
+    `every` generations, so a generation can be replayed and studied afterwards
+    without running it again (see Recording and src/simulation/replay.py).
+    Frames have a fixed width and are appended to the file one after the other,
+    frame n of the file lives at a known offset, and a small index file next to it
+    holds the first frame of every recorded generation.
+    Recording into an existing file appends to it, a frame cut short by a crash is dropped,
+    and so is a generation cut short (agents still alive in its last frame), which a run
+    resumed from a checkpoint plays again. Every Recorder starts a new segment of the index
+    with its first frame, even when its generation was recorded before, so runs appended
+    to the same file never merge, see Recording.segments.
+    """
+
+    def __init__(self, path, simulation, every=1):
+        state = simulation.state
+        self.path = path
+        self.every = every #record one generation out of every
+        sizes = (state.population_size, len(simulation.obstacles), len(state.sensor_angles))
+        header = np.zeros((), dtype=_header(*sizes))
+        header['magic'] = MAGIC
+        header['sizes'] = sizes
+        static = header['static']
+        static['centres'] = [(obstacle.x, obstacle.y) for obstacle in simulation.obstacles]
+        static['radii'] = [obstacle.r for obstacle in simulation.obstacles]
+        static['colours'] = [obstacle.colour for obstacle in simulation.obstacles]
+        static['moving'] = [obstacle.speed != 0 for obstacle in simulation.obstacles]
+        static['sensor_angles'] = state.sensor_angles
+        static['size'] = state.size
+        static['max_range'] = state.max_range
+        self.frame = np.zeros((), dtype=_layout(*sizes)[1]) #the next frame is filled in here, then appended
+        self.frames = 0 #number of frames in the file
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            existing = np.fromfile(path, dtype=header.dtype, count=1)
+            if len(existing) == 0 or existing[0]['magic'] != MAGIC or tuple(existing[0]['sizes']) != sizes:
+                raise ValueError("{} holds a recording of another population or map".format(path))
+            self.frames = (os.path.getsize(path) - header.dtype.itemsize) // self.frame.dtype.itemsize
+            index = _read_index(path)
+            index = index[index[:, 1] < self.frames]
+            if len(index):
+                last = np.fromfile(path, dtype=self.frame.dtype, count=1,
+                                   offset=header.dtype.itemsize + (self.frames - 1) * self.frame.dtype.itemsize)
+                if last[0]['alive'].any(): #the last generation never ended
+                    self.frames = int(index[-1, 1])
+                    index = index[:-1]
+            os.truncate(path, header.dtype.itemsize + self.frames * self.frame.dtype.itemsize)
+            index.astype('<i8').tofile(_index_path(path))
+        else:
+            with open(path, "wb") as file:
+                file.write(header.tobytes())
+            open(_index_path(path), "wb").close()
+        self.last_generation = None #generation of the current segment, none until the first frame
+        self.file = open(path, "ab")
+        self.index = open(_index_path(path), "ab")
+
+    def record(self, simulation):
+        """
+        Appends the current state of the simulation, if its generation is recorded.
+        """
+        generation = simulation.generation
+        if generation % self.every:
+            return
+        if generation != self.last_generation:
+            self.file.flush() #the index never points past the data
+            self.index.write(np.array([generation, self.frames], dtype='<i8').tobytes())
+            self.index.flush()
+            self.last_generation = generation
+        state = simulation.state
+        frame = self.frame
+        frame['generation'] = generation
+        frame['tick'] = simulation.tick
+        frame['x'] = state.x
+        frame['y'] = state.y
+        frame['angle'] = state.angle
+        frame['sensor_distances'] = state.sensor_distances
+        frame['obstacles'] = simulation.obstacle_centres()
+        frame['alive'] = state.alive
+        self.file.write(frame.tobytes())
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+        self.index.close()
+
+
+def _read_index(path):
+    return np.fromfile(_index_path(path), dtype='<i8').reshape(-1, 2)
+
+
+class Recording:
+    """
+    Read-only view of a file written by a Recorder. The frames are mapped in memory,
+    not read, so opening a large recording is instant and any tick of any generation
+    is reached in constant time.
+    segments lists the (generation, first frame, end frame) of every recorded generation
+    in file order. A generation recorded more than once (a run resumed from an older
+    checkpoint, or another run appended to the file) has one segment per recording,
+    generation() and the other lookups by generation read the last one, segment() any of them.
+    """
+
+    def __init__(self, path):
+        sizes = np.fromfile(path, dtype=np.dtype([('magic', 'S8'), ('sizes', '<i8', (3,))]), count=1)
+        if len(sizes) == 0 or sizes[0]['magic'] != MAGIC:
+            raise ValueError("{} is not a recording".format(path))
+        self.population_size, self.nb_obstacles, self.nb_sensors = (int(n) for n in sizes[0]['sizes'])
+        header = _header(self.population_size, self.nb_obstacles, self.nb_sensors)
+        self.static = np.fromfile(path, dtype=header, count=1)[0]['static']
+        frame = _layout(self.population_size, self.nb_obstacles, self.nb_sensors)[1]
+        count = (os.path.getsize(path) - header.itemsize) // frame.itemsize #a frame cut short is ignored
+        self.frames = np.memmap(path, dtype=frame, mode='r', offset=header.itemsize, shape=(count,)) \
+            if count else np.empty(0, dtype=frame)
+        index = _read_index(path)
+        index = index[index[:, 1] < count]
+        ends = [int(start) for start in index[1:, 1]] + [count]
+        self.segments = [(int(generation), int(start), end) for (generation, start), end in zip(index, ends)]
+        self.generations = [generation for generation, _, _ in self.segments]
+        self._starts = {generation: start for generation, start, _ in self.segments} #the last segment wins
+        self._ends = {generation: end for generation, _, end in self.segments}
+
+    def __len__(self):
+        return len(self.frames)
+
+    def ticks(self, generation):
+        """
+        Number of ticks recorded for the generation.
+        """
+        return self._ends[generation] - self._starts[generation]
+
+    def frame(self, generation, tick):
+        """
+        Frame of the given tick of a generation, counted from the start of the generation.
+        """
+        if not 0 <= tick < self.ticks(generation):
+            raise IndexError("generation {} has {} recorded ticks".format(generation, self.ticks(generation)))
+        return self.frames[self._starts[generation] + tick]
+
+    def generation(self, generation):
+        """
+        All the frames of a generation, as a memory-mapped array.
+        """
+        return self.frames[self._starts[generation]:self._ends[generation]]
+
+    def segment(self, i):
+        """
+        All the frames of the i-th segment of the index, as a memory-mapped array.
+        """
+        _, start, end = self.segments[i]
+        return self.frames[start:end]
+
+    def agent(self, generation, agent):
+        """
+        Trajectory of one agent over a generation: x, y, angle, sensor distances and alive flag
+        per tick, as a dict of arrays.
+        """
+        frames = self.generation(generation)
+        return {key: np.array(frames[key][:, agent]) for key in ('x', 'y', 'angle', 'sensor_distances', 'alive')}
@@ -0,0 +1,128 @@
+import numpy as np
+import pygame
+
+from src.common.constants import SimulationSettings
+from src.common.profiling import profiler
+
+
+class Renderer:
+    """
+    Optional pygame front end of the simulation. It never changes the state
+    of the world, it only reads the obstacles and agents of a Simulation
+    and draws them.
+    Drawing is kept cheap so watching doesn't slow the simulation down much:
+    only one tick out of render_every is drawn, the static part of the map is
+    drawn once into a background, and each frame only erases and sends to the
+    display the areas that changed (dirty rectangles).
+    top_k limits the drawn agents to the fittest living ones, and rays_top_k
+    limits the sensor rays to the fittest of those.
+    """
+
+    def __init__(self, width=SimulationSettings.WIDTH, height=SimulationSettings.HEIGHT,
+                 render_every=1, top_k=None, rays_top_k=None):
+        pygame.init()
+        self.width = width
+        self.height = height
+        self.render_every = render_every #draw one tick out of render_every
+        self.top_k = top_k #number of agents drawn, the fittest living ones, None for all
+        self.rays_top_k = rays_top_k #number of drawn agents that show their sensor rays, None for all
+        self.screen = pygame.display.set_mode((width, height))
+        pygame.display.set_caption(SimulationSettings.CAPTION)
+        self.background = None #static part of the map, drawn on the first frame
+        self._moving = None #mask of the obstacles that aren't part of the background
+        self._dirty = [] #areas drawn over by the last frame, erased by the next one
+
+    def handle_events(self, simulation):
+        """
+        Returns False once the window has been closed.
+        Pressing F toggles the fast-forward mode of the simulation clock,
+        P toggles the profiler.
+        """
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_f:
+                simulation.clock.toggle_fast_forward()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+                profiler.toggle()
+        return True
+
+    def draw(self, simulation):
+        """
+        Draws one frame of the simulation every render_every ticks
+        and updates the parts of the display that changed.
+        """
+        if simulation.clock.ticks % self.render_every:
+            return
+        with profiler.phase("rendering"):
+            self._draw(simulation)
+
+    def _draw(self, simulation):
+        if self.background is None:
+            self.background = self._static_environment(simulation.obstacles)
+            self.screen.blit(self.background, (0, 0))
+            pygame.display.flip()
+        for rect in self._dirty:
+            self.screen.blit(self.background, rect, rect)
+        drawn = []
+        centres = simulation.obstacle_centres()
+        for i in np.flatnonzero(self._moving):
+            drawn.append(self._draw_obstacle(simulation.obstacles[i], centres[i]))
+        state = simulation.state
+        origins, ends = state.sensor_segments()
+        agents = self._agents_to_draw(state)
+        rays = len(agents) if self.rays_top_k is None else self.rays_top_k
+        for rank, i in enumerate(agents):
+            drawn.append(self._draw_agent(state, i, origins[i], ends[i], rank < rays))
+        pygame.display.update(self._dirty + drawn)
+        self._dirty = drawn
+
+    def _agents_to_draw(self, state):
+        """
+        Indices of the living agents to draw, fittest first when only some of them are drawn.
+        """
+        agents = np.flatnonzero(state.alive)
+        if self.top_k is None and self.rays_top_k is None:
+            return agents
+        agents = agents[np.argsort(-state.fitness[agents], kind='stable')]
+        return agents if self.top_k is None else agents[:self.top_k]
+
+    def close(self):
+        pygame.quit()
+
+    def _static_environment(self, obstacles):
+        """
+        Draws the static elements of the map on a background surface: the background
+        colour, the map boundary, the target and the obstacles that never move.
+        """
+        background = pygame.Surface((self.width, self.height)).convert()
+        background.fill(SimulationSettings.BACKGROUND_COLOUR)
+        pygame.draw.rect(background, (255, 255, 255),
+                         (10, 10, self.width - 20, self.height - 20), 1)
+        pygame.draw.circle(background, (255, 10, 0), SimulationSettings.TARGET_LOCATION, 10, 0)
+        self._moving = np.array([obstacle.speed != 0 for obstacle in obstacles], dtype=bool)
+        for obstacle, moving in zip(obstacles, self._moving):
+            if not moving:
+                pygame.draw.circle(background, obstacle.colour, (obstacle.x, obstacle.y), obstacle.r, 0)
+        return background
+
+    def _draw_obstacle(self, obstacle, centre):
+        return pygame.draw.circle(self.screen, obstacle.colour, centre, obstacle.r, 0)
+
+    def _draw_agent(self, state, i, origins, ends, rays=True):
+        """
+        Draws one agent, with its engaged sensors when rays is True,
+        and returns the area it covers.
+        """
+        area = pygame.draw.circle(self.screen, (255, 255, 255),
+                                  (int(state.x[i]), int(state.y[i])), state.size, 0)
+        #one line that is an extension of a sensor to give a visual indication of the robot orientation
+        pygame.draw.line(self.screen, (0, 0, 0), (state.x[i], state.y[i]), origins[0])
+        if not rays:
+            return area
+        for origin, end, distance in zip(origins, ends, state.sensor_distances[i]):
+            if distance < state.max_range: #sensor engaged with an obstacle
+                intersection = origin + (end - origin) * (distance / state.max_range)
+                area.union_ip(pygame.draw.line(self.screen, (255, 0, 0), origin, intersection))
+                area.union_ip(pygame.draw.circle(self.screen, (0, 255, 0), intersection, 1, 0)) #indicates intersection point
+        return area
@@ -0,0 +1,46 @@
+"""
+Replay of a recorded generation.
+
+Runs are recorded with --record (see Recorder). Replaying draws the recorded frames with
+the usual Renderer, the brains and the sensors are not run again. Any tick can be
+jumped to directly, and the replay can be restricted to some agents.
+
+    python run.py --headless --record run.rec --record-every 10
+    python -m src.simulation.replay run.rec --generation 50 --agents 3 7 --tick 120
+"""
+import argparse
+
+from src.simulation.recording import Recording
+from src.simulation.viewer import StreamView
+
+
+def replay(path, generation=None, agents=None, tick=0, fps=60):
+    """
+    Draws the frames of a generation, the last recorded one by default, from the given tick,
+    then keeps the last frame on screen until the window is closed.
+    """
+    from src.simulation.renderer import Renderer
+    recording = Recording(path)
+    if generation is None:
+        generation = recording.generations[-1]
+    view = StreamView(recording.static, recording.population_size, recording.nb_sensors, fps)
+    renderer = Renderer()
+    ticks = recording.ticks(generation)
+    while renderer.handle_events(view):
+        if tick < ticks:
+            view.show(recording.frame(generation, tick), agents)
+            renderer.draw(view)
+            tick += 1
+        view.clock.tick()
+    renderer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a generation recorded with --record.")
+    parser.add_argument("path", help="recording file")
+    parser.add_argument("--generation", type=int, help="generation to replay, the last recorded one by default")
+    parser.add_argument("--agents", type=int, nargs="+", help="only show these agents")
+    parser.add_argument("--tick", type=int, default=0, help="tick of the generation to start from")
+    parser.add_argument("--fps", type=int, default=60, help="ticks replayed per second")
+    args = parser.parse_args()
+    replay(args.path, args.generation, args.agents, args.tick, args.fps)
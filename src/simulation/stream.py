@@ -0,0 +1,150 @@
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+DEFAULT_NAME = "collision_avoidance_stream"
+
+#the block starts with these int64 fields, followed by the static part of the map and the ring of frames
+_POPULATION, _OBSTACLES, _SENSORS, _SLOTS, _WRITTEN = range(5)
+_HEADER = 8
+
+
+def _layout(population_size, nb_obstacles, nb_sensors):
+    """
+    Structured dtypes of the static part of the stream and of one frame.
+    """
+    static = np.dtype([
+        ('centres', 'f8', (nb_obstacles, 2)), #starting position of the obstacles
+        ('radii', 'f8', (nb_obstacles,)),
+        ('colours', 'f8', (nb_obstacles, 3)),
+        ('moving', '?', (nb_obstacles,)),
+        ('sensor_angles', 'f8', (nb_sensors,)),
+        ('size', 'f8'),
+        ('max_range', 'f8')
+    ], align=True)
+    frame = np.dtype([
+        ('sequence', 'i8'), #number of the frame, -1 while it is being written
+        ('tick', 'i8'),
+        ('generation', 'i8'),
+        ('x', 'f8', (population_size,)),
+        ('y', 'f8', (population_size,)),
+        ('angle', 'f8', (population_size,)),
+        ('fitness', 'f8', (population_size,)),
+        ('sensor_distances', 'f8', (population_size, nb_sensors)),
+        ('obstacles', 'f8', (nb_obstacles, 2)),
+        ('alive', '?', (population_size,))
+    ], align=True)
+    return static, frame
+
+
+class StateStream:
+    """
+    Ring buffer of simulation frames in shared memory, so the training can be watched
+    from another process (see src/simulation/viewer.py) without slowing it down.
+    The simulation publishes the positions, headings, alive flags, fitness and sensor
+    readings of the agents and the positions of the obstacles every publish_every ticks.
+    Publishing is a few array copies into the next slot of the ring, it never waits on
+    a reader, and readers come and go at will and only ever look at the newest frame,
+    skipping the ones they were too slow for.
+    Each frame carries a sequence number, set to -1 while the frame is written, so a
+    reader can tell a frame that was overwritten while it copied it and drop it.
+    """
+
+    def __init__(self, shared, owner, publish_every=1):
+        self.shared = shared
+        self.owner = owner #the publishing process, which unlinks the block on close
+        self.publish_every = publish_every
+        self.header = np.ndarray((_HEADER,), dtype=np.int64, buffer=shared.buf)
+        self.population_size, self.nb_obstacles, self.nb_sensors, self.slots = (int(n) for n in self.header[:_WRITTEN])
+        static, frame = _layout(self.population_size, self.nb_obstacles, self.nb_sensors)
+        self.static = np.ndarray((), dtype=static, buffer=shared.buf, offset=self.header.nbytes)
+        self.frames = np.ndarray((self.slots,), dtype=frame, buffer=shared.buf,
+                                 offset=self.header.nbytes + static.itemsize)
+
+    @classmethod
+    def create(cls, simulation, name=DEFAULT_NAME, slots=16, publish_every=1):
+        """
+        Creates the stream of a simulation. A block left behind under the same name
+        by a run that crashed is replaced.
+        """
+        state = simulation.state
+        obstacles = simulation.obstacles
+        static, frame = _layout(state.population_size, len(obstacles), len(state.sensor_angles))
+        size = _HEADER * 8 + static.itemsize + slots * frame.itemsize
+        try:
+            shared = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shared = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER,), dtype=np.int64, buffer=shared.buf)
+        header[:] = 0
+        header[[_POPULATION, _OBSTACLES, _SENSORS, _SLOTS]] = state.population_size, len(obstacles), \
+            len(state.sensor_angles), slots
+        stream = cls(shared, True, publish_every)
+        stream.static['centres'] = [(obstacle.x, obstacle.y) for obstacle in obstacles]
+        stream.static['radii'] = [obstacle.r for obstacle in obstacles]
+        stream.static['colours'] = [obstacle.colour for obstacle in obstacles]
+        stream.static['moving'] = [obstacle.speed != 0 for obstacle in obstacles]
+        stream.static['sensor_angles'] = state.sensor_angles
+        stream.static['size'] = state.size
+        stream.static['max_range'] = state.max_range
+        return stream
+
+    @classmethod
+    def attach(cls, name=DEFAULT_NAME):
+        """
+        Maps the stream published by another process. Raises FileNotFoundError
+        when nothing is published under that name.
+        """
+        shared = shared_memory.SharedMemory(name=name)
+        #the publisher owns the block, the resource tracker of a reader must not unlink it when the reader exits
+        resource_tracker.unregister(shared._name, "shared_memory")
+        return cls(shared, False)
+
+    def publish(self, simulation):
+        """
+        Writes the current state of the simulation in the next slot of the ring,
+        every publish_every ticks.
+        """
+        if simulation.clock.ticks % self.publish_every:
+            return
+        written = int(self.header[_WRITTEN])
+        slot = written % self.slots
+        frames = self.frames
+        state = simulation.state
+        frames['sequence'][slot] = -1
+        frames['tick'][slot] = simulation.tick
+        frames['generation'][slot] = simulation.generation
+        frames['x'][slot] = state.x
+        frames['y'][slot] = state.y
+        frames['angle'][slot] = state.angle
+        frames['fitness'][slot] = state.fitness
+        frames['sensor_distances'][slot] = state.sensor_distances
+        frames['obstacles'][slot] = simulation.obstacle_centres()
+        frames['alive'][slot] = state.alive
+        frames['sequence'][slot] = written
+        self.header[_WRITTEN] = written + 1
+
+    def latest(self, since=-1):
+        """
+        Returns a copy of the newest frame if it is newer than the frame numbered since,
+        None otherwise or when the frame got overwritten while being copied.
+        """
+        newest = int(self.header[_WRITTEN]) - 1
+        if newest <= since:
+            return None
+        slot = newest % self.slots
+        frame = self.frames[slot].copy()
+        if frame['sequence'] != newest or self.frames['sequence'][slot] != newest:
+            return None
+        return frame
+
+    def close(self):
+        """
+        Detaches from the stream, the publisher also removes it.
+        """
+        self.header = self.static = self.frames = None #views into the block have to go before it is closed
+        self.shared.close()
+        if self.owner:
+            self.shared.unlink()
@@ -0,0 +1,113 @@
+"""
+Live viewer of a training run, in its own process.
+
+The training publishes its state with --stream (see StateStream), the viewer attaches
+to it and draws the newest frame with the usual Renderer. It can be started and closed
+at any time, before the training, during it or after a restart of it, and the training
+never waits for it.
+
+    python run.py --headless --stream
+    python -m src.simulation.viewer
+"""
+import argparse
+import time
+import numpy as np
+
+from src.agent.population_state import PopulationState
+from src.environment.obstacle import Circle
+from src.simulation.clock import SimulationClock
+from src.simulation.stream import DEFAULT_NAME, StateStream
+
+
+class StreamView:
+    """
+    Stands in for a Simulation in front of the Renderer, its state is the last frame
+    read from a StateStream, or from a Recording.
+    static holds the map and the agent settings, see the layouts of both.
+    """
+
+    def __init__(self, static, population_size, nb_sensors, fps=30):
+        self.obstacles = [
+            Circle(x, y, r, tuple(int(c) for c in colour), i + 1, moving=bool(moving))
+            for i, ((x, y), r, colour, moving)
+            in enumerate(zip(static['centres'], static['radii'], static['colours'], static['moving']))
+        ]
+        self.state = PopulationState(population_size, size=float(static['size']),
+                                     nb_sensors=nb_sensors, max_range=float(static['max_range']))
+        self.state.sensor_angles = static['sensor_angles'].copy()
+        self.clock = SimulationClock(fps) #paces the viewer, not the simulation
+        self.generation = 0
+        self.tick = 0
+        self._centres = static['centres'].copy()
+
+    def obstacle_centres(self):
+        return self._centres
+
+    def show(self, frame, agents=None):
+        """
+        Takes the state of the frame. When agents are given, the other agents are hidden.
+        """
+        self.generation = int(frame['generation'])
+        self.tick = int(frame['tick'])
+        for key in ('x', 'y', 'angle', 'fitness', 'sensor_distances', 'alive'):
+            if key in frame.dtype.names:
+                getattr(self.state, key)[...] = frame[key]
+        if agents is not None:
+            hidden = np.ones(self.state.population_size, dtype=bool)
+            hidden[agents] = False
+            self.state.alive[hidden] = False
+        self._centres = np.array(frame['obstacles'], dtype=float)
+
+
+def attach(name, retry_every=1.0):
+    """
+    Waits until a stream is published under that name and attaches to it.
+    """
+    while True:
+        try:
+            return StateStream.attach(name)
+        except FileNotFoundError:
+            time.sleep(retry_every)
+
+
+def watch(name=DEFAULT_NAME, fps=30, timeout=5.0, top_k=None, rays_top_k=None):
+    """
+    Draws the newest frame of the stream fps times per second until the window is closed.
+    When no frame comes for timeout seconds the training may have been restarted,
+    so the viewer attaches again to whatever is published under the name.
+    """
+    from src.simulation.renderer import Renderer
+    stream = attach(name)
+    view = StreamView(stream.static, stream.population_size, stream.nb_sensors, fps)
+    renderer = Renderer(top_k=top_k, rays_top_k=rays_top_k)
+    last = -1 #sequence number of the last frame drawn
+    last_seen = time.monotonic()
+    while renderer.handle_events(view):
+        frame = stream.latest(last)
+        if frame is not None:
+            last = int(frame['sequence'])
+            last_seen = time.monotonic()
+            view.show(frame)
+            renderer.draw(view)
+        elif time.monotonic() - last_seen > timeout:
+            stream.close()
+            stream = attach(name)
+            view = StreamView(stream.static, stream.population_size, stream.nb_sensors, fps)
+            renderer.background = None #the map may have changed
+            last = -1
+            last_seen = time.monotonic()
+        view.clock.tick()
+    stream.close()
+    renderer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch a training run that publishes its state with --stream.")
+    parser.add_argument("--name", default=DEFAULT_NAME, help="name of the shared memory stream")
+    parser.add_argument("--fps", type=int, default=30, help="frames drawn per second at most")
+    parser.add_argument("--timeout", type=float, default=5.0,
+                        help="seconds without a new frame before attaching again")
+    parser.add_argument("--top-k", type=int, metavar="K", help="only draw the K fittest living agents")
+    parser.add_argument("--rays-top-k", type=int, metavar="K", help="only draw the sensor rays of the K fittest drawn agents")
+    args = parser.parse_args()
+    watch(args.name, args.fps, args.timeout, args.top_k, args.rays_top_k)